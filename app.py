@@ -1,13 +1,53 @@
 # app.py - Flask Backend for TSP Distance Optimizer
 from flask import Flask, request, jsonify, send_from_directory, redirect
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
 import requests
-import itertools
+from requests.adapters import HTTPAdapter
 from typing import List, Tuple
 import math
+import random
 import time
 import os
 import json
+import hashlib
+import threading
+import atexit
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import numpy as np
+from cachetools import TTLCache
+
+# orjson is optional: it speeds up cache files and the large autocomplete
+# responses, with the stdlib json module as the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Numba is optional: when it is missing the kernels below run as plain
+# Python, which is slower but gives identical results.
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+# fcntl (POSIX only) serializes cache-file updates across gunicorn
+# workers; without it writes still merge, but may race.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # Enable CORS for frontend communication
 
@@ -17,7 +57,12 @@ load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
-CORS(app)  # Enable CORS for frontend communication
+# Compress large JSON (distance matrices, route geometry); small
+# autocomplete responses are sent as-is
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL_BROTLI'] = 5
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
 
 # Google Distance Matrix API configuration
 # Config from environment (use .env in development)
@@ -27,7 +72,354 @@ DISTANCE_MATRIX_URL = os.environ.get('GOOGLE_DISTANCE_MATRIX_URL', 'https://maps
 # External services (override with env vars for production)
 PHOTON_URL = os.environ.get('PHOTON_URL', 'https://photon.komoot.io/api')
 NOMINATIM_SEARCH_URL = os.environ.get('NOMINATIM_SEARCH_URL', 'https://nominatim.openstreetmap.org/search')
-OSRM_BASE_URL = os.environ.get('OSRM_BASE_URL', 'https://router.project-osrm.org')
+OSRM_BASE_URL = os.environ.get('OSRM_BASE_URL', 'https://router.project-osrm.org').rstrip('/')
+
+# Bbox for India (approx) to bias results to India
+# Format: lon_min,lat_min,lon_max,lat_max
+INDIA_BBOX = "68.0,6.5,97.5,35.5"
+# Static query params, built once as tuples of pairs; callers append
+# ('q', ...) and ('limit', ...) rather than building a dict per request
+PHOTON_BASE_PARAMS = (('lang', 'en'), ('bbox', INDIA_BBOX))
+NOMINATIM_BASE_PARAMS = (('format', 'json'), ('addressdetails', '1'), ('countrycodes', 'in'))
+# Single-result variants used by the geocoder
+PHOTON_GEOCODE_PARAMS = PHOTON_BASE_PARAMS + (('limit', '1'),)
+NOMINATIM_GEOCODE_PARAMS = NOMINATIM_BASE_PARAMS + (('limit', '1'),)
+# /search stays worldwide, so it has no countrycodes filter
+NOMINATIM_SEARCH_PARAMS = (('format', 'json'), ('addressdetails', '1'), ('limit', '1'))
+# OSRM request path prefixes (coordinates are appended) and fixed params
+OSRM_ROUTE_PATH = '/route/v1/driving/'
+OSRM_TABLE_PATH = '/table/v1/driving/'
+OSRM_ROUTE_URL = OSRM_BASE_URL + OSRM_ROUTE_PATH
+OSRM_PAIR_PARAMS = (('overview', 'false'),)
+OSRM_GEOMETRY_PARAMS = (('overview', 'full'), ('geometries', 'geojson'))
+# Optional comma-separated OSRM hosts. OSRM_BASE_URL stays the primary; the
+# first other host listed here receives a hedged copy of slow table/route
+# requests (any further hosts are ignored).
+OSRM_BASE_URLS = [u.strip().rstrip('/') for u in os.environ.get('OSRM_BASE_URLS', OSRM_BASE_URL).split(',') if u.strip()]
+# How long (ms) to wait on the primary before hedging, until enough
+# latency samples exist to use the observed p95 instead
+OSRM_HEDGE_DELAY_MS = float(os.environ.get('OSRM_HEDGE_DELAY_MS', '400'))
+# Concurrent OSRM route lookups used when the table API leaves gaps
+OSRM_PARALLEL = int(os.environ.get('OSRM_PARALLEL', '16'))
+# Per-attempt timeout (s) for those lookups; kept short so a few slow
+# responses don't hold the worker pool
+OSRM_PAIR_TIMEOUT = float(os.environ.get('OSRM_PAIR_TIMEOUT', '6'))
+# Treat driving distance A->B as equal to B->A when falling back to
+# pairwise route lookups: only the upper triangle is fetched and mirrored,
+# halving the calls. Null (unreachable) cells of the OSRM table are also
+# filled from the reverse direction when it has one. Cells the table did
+# return are kept as-is. One-way roads make real distances differ by a few
+# percent, an acceptable error for a fallback; set to 0 to fetch both ways.
+ASSUME_SYMMETRIC_DRIVING = os.environ.get('ASSUME_SYMMETRIC_DRIVING', '1').lower() in ('1', 'true', 'yes')
+# Above this many locations the OSRM table request is split into
+# parallel sub-requests of at most this many source rows each
+OSRM_TABLE_SPLIT_THRESHOLD = int(os.environ.get('OSRM_TABLE_SPLIT_THRESHOLD', '16'))
+# Concurrent geocoding lookups for locations missing from the cache
+GEOCODE_PARALLEL = int(os.environ.get('GEOCODE_PARALLEL', '8'))
+# Age after which cached distance matrices / pair distances are refetched
+MATRIX_CACHE_TTL_DAYS = float(os.environ.get('MATRIX_CACHE_TTL_DAYS', '30'))
+# Most whole matrices kept in distance_matrix_cache.json (newest win)
+MATRIX_CACHE_MAX_MATRICES = int(os.environ.get('MATRIX_CACHE_MAX_MATRICES', '500'))
+# Most per-location pair rows kept in distance_matrix_cache.json (most
+# recently written win)
+MATRIX_CACHE_MAX_PAIR_ROWS = int(os.environ.get('MATRIX_CACHE_MAX_PAIR_ROWS', '5000'))
+# New matrix cache entries are written to disk at most this often (s)
+MATRIX_CACHE_FLUSH_SECONDS = float(os.environ.get('MATRIX_CACHE_FLUSH_SECONDS', '5'))
+
+# Shared HTTP session for all outbound calls (OSRM, Photon, Nominatim) so
+# TCP/TLS connections are kept alive and reused. Session.get is safe to call
+# from the geocoding and pairwise-lookup worker threads.
+# Pool sized so every pairwise/geocoding worker can hold a connection.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32,
+                       pool_maxsize=max(64, OSRM_PARALLEL + GEOCODE_PARALLEL),
+                       max_retries=0)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+SESSION.headers.update({
+    'User-Agent': 'DistanceOptimalityProblem/1.0 (contact@example.com)'
+})
+
+
+class RateLimiter:
+    """Spaces calls at least `interval` seconds apart across threads.
+
+    Each caller reserves the next free slot under a lock and sleeps until
+    it arrives, so parallel geocoding workers still respect Nominatim's
+    usage policy instead of each one pacing only itself.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _json_default(obj):
+    """Convert NumPy arrays and scalars for the stdlib json fallback."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _json_dumps(obj) -> str:
+    """Serialize obj to a JSON string, using orjson when available.
+
+    NumPy arrays and scalars are serialized directly in both paths.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    return json.dumps(obj, default=_json_default)
+
+
+def _json_loads(text):
+    """Parse a JSON string or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by _json_dumps/_json_loads.
+
+    Makes jsonify use orjson (with NumPy support) when it is installed.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return _json_dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return _json_loads(s)
+
+
+app.json = OrjsonProvider(app)
+
+
+# Largest instance solved exactly with Held-Karp (O(n^2 * 2^n)); without
+# Numba the DP runs in the interpreter, so keep the exact range smaller.
+HELD_KARP_MAX_LOCATIONS = 15 if NUMBA_AVAILABLE else 10
+
+
+# ---------- Numeric TSP kernels (compiled with Numba when available) ----------
+@njit(cache=True)
+def _held_karp(D):
+    """
+    Exact TSP tour starting and ending at index 0 via Held-Karp DP
+
+    dp[mask, v] holds the cheapest path that starts at 0, visits exactly
+    the nodes in ``mask`` and ends at ``v``.
+
+    Returns:
+        Tuple of (path indices of length n + 1, total distance)
+    """
+    n = D.shape[0]
+    full = (1 << n) - 1
+    dp = np.full((1 << n, n), np.inf)
+    parent = np.full((1 << n, n), -1, dtype=np.int16)
+    dp[1, 0] = 0.0
+
+    for mask in range(1, 1 << n):
+        # Every partial tour starts at node 0
+        if not (mask & 1):
+            continue
+        for u in range(n):
+            if not (mask >> u) & 1:
+                continue
+            cost = dp[mask, u]
+            if cost == np.inf:
+                continue
+            for v in range(n):
+                if (mask >> v) & 1:
+                    continue
+                nxt = mask | (1 << v)
+                cand = cost + D[u, v]
+                if cand < dp[nxt, v]:
+                    dp[nxt, v] = cand
+                    parent[nxt, v] = u
+
+    best = np.inf
+    last = 0
+    for j in range(1, n):
+        cand = dp[full, j] + D[j, 0]
+        if cand < best:
+            best = cand
+            last = j
+
+    # Walk the parent pointers back from the last node to 0
+    path = np.zeros(n + 1, dtype=np.int64)
+    mask = full
+    cur = last
+    for k in range(n - 1, 0, -1):
+        path[k] = cur
+        prev = np.int64(parent[mask, cur])
+        mask ^= 1 << cur
+        cur = prev
+    return path, best
+
+
+@njit(cache=True)
+def _branch_and_bound(D):
+    """
+    Exact TSP tour from index 0 by depth-first search over permutations,
+    abandoning any prefix that cannot beat the best tour found so far
+
+    The bound charges every node that still has to be left (the current
+    one and all unvisited ones) its cheapest outgoing edge.
+
+    Returns:
+        Tuple of (path indices of length n + 1, total distance)
+    """
+    n = D.shape[0]
+    min_out = np.empty(n)
+    for i in range(n):
+        m = np.inf
+        for j in range(n):
+            if i != j and D[i, j] < m:
+                m = D[i, j]
+        min_out[i] = m
+
+    best = np.inf
+    best_path = np.zeros(n + 1, dtype=np.int64)
+    path = np.zeros(n, dtype=np.int64)
+    cost = np.zeros(n)
+    next_cand = np.ones(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+    visited[0] = True
+    # Sum of min_out over unvisited nodes
+    rest = 0.0
+    for i in range(1, n):
+        rest += min_out[i]
+
+    # path[0] is fixed to 0; depth is the position being filled
+    depth = 1
+    while depth > 0:
+        j = next_cand[depth]
+        if j >= n:
+            # All candidates tried at this depth: backtrack
+            depth -= 1
+            if depth > 0:
+                v = path[depth]
+                visited[v] = False
+                rest += min_out[v]
+            continue
+        next_cand[depth] = j + 1
+        if visited[j]:
+            continue
+
+        new_cost = cost[depth - 1] + D[path[depth - 1], j]
+        if depth == n - 1:
+            total = new_cost + D[j, 0]
+            if total < best:
+                best = total
+                for k in range(depth):
+                    best_path[k] = path[k]
+                best_path[depth] = j
+                best_path[n] = 0
+            continue
+        if new_cost + rest >= best:
+            continue
+
+        path[depth] = j
+        cost[depth] = new_cost
+        visited[j] = True
+        rest -= min_out[j]
+        depth += 1
+        next_cand[depth] = 1
+
+    return best_path, best
+
+
+@njit(cache=True)
+def _nn_tour(D, start, bound=np.inf):
+    """
+    Nearest Neighbor tour from ``start`` over a float64 distance matrix
+
+    The walk is abandoned as soon as its partial length exceeds ``bound``
+    (the best tour known so far), in which case the distance is inf.
+
+    Returns:
+        Tuple of (path indices of length n + 1, total distance)
+    """
+    n = D.shape[0]
+    visited = np.zeros(n, dtype=np.bool_)
+    path = np.empty(n + 1, dtype=np.int64)
+    visited[start] = True
+    path[0] = start
+    cur = start
+    total = 0.0
+
+    for step in range(1, n):
+        best_d = np.inf
+        best_j = -1
+        for j in range(n):
+            if not visited[j] and D[cur, j] < best_d:
+                best_d = D[cur, j]
+                best_j = j
+        # Only inf distances left: take the first unvisited node
+        if best_j < 0:
+            for j in range(n):
+                if not visited[j]:
+                    best_j = j
+                    best_d = D[cur, j]
+                    break
+        total += best_d
+        if total > bound:
+            return path, np.inf
+        visited[best_j] = True
+        path[step] = best_j
+        cur = best_j
+
+    # Return to start
+    total += D[cur, start]
+    path[n] = start
+    return path, total
+
+
+@njit(cache=True)
+def _two_opt(D, tour):
+    """
+    Improve a closed tour (tour[0] == tour[-1]) in place with 2-opt moves
+    until no reversal shortens it any further
+
+    Returns:
+        The improved tour
+    """
+    n = tour.shape[0] - 1
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a = tour[i - 1]
+                b = tour[i]
+                c = tour[j]
+                d = tour[j + 1]
+                delta = D[a, c] + D[b, d] - D[a, b] - D[c, d]
+                if delta >= -1e-9:
+                    continue
+                # Reversing tour[i..j] also flips the direction of its
+                # inner edges, which matters for asymmetric road distances
+                for k in range(i, j):
+                    delta += D[tour[k + 1], tour[k]] - D[tour[k], tour[k + 1]]
+                if delta < -1e-9:
+                    lo = i
+                    hi = j
+                    while lo < hi:
+                        tmp = tour[lo]
+                        tour[lo] = tour[hi]
+                        tour[hi] = tmp
+                        lo += 1
+                        hi -= 1
+                    improved = True
+    return tour
 
 
 class TSPSolver:
@@ -46,7 +438,10 @@ class TSPSolver:
         """
         self.locations = locations
         self.distance_matrix = distance_matrix
+        self.D = np.asarray(distance_matrix, dtype=np.float64)
         self.n = len(locations)
+        # Set by solve_optimal to the method that produced the route
+        self.algorithm_used = None
 
     def nearest_neighbor(self, start_index: int = 0) -> (
             Tuple[List[int], float]):
@@ -58,32 +453,90 @@ class TSPSolver:
 
         Returns:
             Tuple of (path indices, total distance)
+
+        Raises:
+            ValueError: If start_index is not a valid location index
         """
-        unvisited = set(range(self.n))
+        # The Numba kernel does no bounds checking
+        if not 0 <= start_index < self.n:
+            raise ValueError(f"start_index must be between 0 and {self.n - 1}")
+
+        if NUMBA_AVAILABLE:
+            path, total_distance = _nn_tour(self.D, start_index)
+            return path.tolist(), float(total_distance)
+
+        # Without Numba, pick each next stop with a vectorized argmin over
+        # the current row with visited locations masked out
+        visited = np.zeros(self.n, dtype=bool)
+        visited[start_index] = True
         current = start_index
         path = [current]
-        unvisited.remove(current)
         total_distance = 0.0
 
-        while unvisited:
-            nearest = min(
-                unvisited,
-                key=lambda x: self.distance_matrix[current][x]
-            )
-            total_distance += self.distance_matrix[current][nearest]
+        for _ in range(self.n - 1):
+            row = self.D[current].copy()
+            row[visited] = np.inf
+            nearest = int(row.argmin())
+            if visited[nearest]:
+                # Only inf distances left: take the first unvisited node,
+                # as _nn_tour does
+                nearest = int(np.flatnonzero(~visited)[0])
+            total_distance += float(self.D[current, nearest])
+            visited[nearest] = True
             current = nearest
             path.append(current)
-            unvisited.remove(current)
 
         # Return to start
-        total_distance += self.distance_matrix[current][start_index]
+        total_distance += float(self.D[current, start_index])
         path.append(start_index)
 
         return path, total_distance
 
+    def nearest_neighbor_all_starts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run Nearest Neighbor from every starting location at once,
+        advancing all n tours in lockstep with array operations
+
+        Returns:
+            Tuple of (n x (n + 1) array of paths, row i starting at
+            location i; array of their total distances)
+        """
+        n = self.n
+        starts = np.arange(n)
+        cur = starts.copy()
+        # Visited cells hold inf and the rest 0, so masking a row is one
+        # in-place add rather than a boolean scatter
+        penalty = np.zeros((n, n))
+        np.fill_diagonal(penalty, np.inf)
+        totals = np.zeros(n)
+        paths = np.empty((n, n + 1), dtype=np.int64)
+        paths[:, 0] = starts
+        # Reused for every step instead of allocating a fresh n x n copy
+        rows = np.empty((n, n))
+
+        for step in range(1, n):
+            np.take(self.D, cur, axis=0, out=rows)
+            rows += penalty
+            nxt = rows.argmin(axis=1)[:, None]
+            # Rows with only inf distances left can pick a visited node;
+            # take the first unvisited one instead, as _nn_tour does
+            stuck = np.isinf(np.take_along_axis(penalty, nxt, axis=1)[:, 0])
+            if stuck.any():
+                nxt[stuck, 0] = np.isfinite(penalty[stuck]).argmax(axis=1)
+            totals += self.D[cur, nxt[:, 0]]
+            np.put_along_axis(penalty, nxt, np.inf, axis=1)
+            cur = nxt[:, 0]
+            paths[:, step] = cur
+
+        # Return to start
+        totals += self.D[cur, starts]
+        paths[:, n] = starts
+        return paths, totals
+
     def solve_all_starting_points(self) -> Tuple[List[str], float]:
         """
-        Try starting from each location and return the best route
+        Try starting from each location, refine the best route with
+        2-opt and return it
 
         Returns:
             Tuple of (optimal path as location names, total distance)
@@ -91,52 +544,89 @@ class TSPSolver:
         best_path = None
         best_distance = float('inf')
 
-        for start_idx in range(self.n):
-            path_indices, distance = self.nearest_neighbor(start_idx)
-            if distance < best_distance:
-                best_distance = distance
-                best_path = path_indices
+        if NUMBA_AVAILABLE:
+            # Seed with start 0, then prune other starts against the best
+            path_indices, distance = _nn_tour(self.D, 0)
+            best_distance = float(distance)
+            best_path = path_indices.tolist()
+            for start_idx in range(1, self.n):
+                path_indices, distance = _nn_tour(self.D, start_idx, best_distance)
+                if distance < best_distance:
+                    best_distance = float(distance)
+                    best_path = path_indices.tolist()
+        else:
+            paths, totals = self.nearest_neighbor_all_starts()
+            best = int(totals.argmin())
+            best_distance = float(totals[best])
+            best_path = paths[best].tolist()
+
+        best_path, best_distance = self.two_opt(best_path)
 
         # Convert indices to location names
         optimal_path = [self.locations[i] for i in best_path]
 
         return optimal_path, best_distance
 
+    def two_opt(self, path: List[int]) -> Tuple[List[int], float]:
+        """
+        Remove crossings from a closed tour with 2-opt local search
+
+        Args:
+            path: Tour as location indices, starting and ending at the
+                same index
+
+        Returns:
+            Tuple of (improved path indices, total distance)
+        """
+        tour = _two_opt(self.D, np.array(path, dtype=np.int64))
+        total_distance = float(self.D[tour[:-1], tour[1:]].sum())
+        return tour.tolist(), total_distance
+
     def solve_optimal(self) -> Tuple[List[str], float]:
         """
-        For small number of locations (<=10), try all permutations
-        for truly optimal solution. For larger sets, use nearest
-        neighbor heuristic
+        For small number of locations (<= HELD_KARP_MAX_LOCATIONS), use
+        Held-Karp dynamic programming for a truly optimal solution. For
+        larger sets, use nearest neighbor heuristic refined by 2-opt
 
         Returns:
             Tuple of (optimal path as location names, total distance)
         """
-        if self.n <= 10:
-            return self._brute_force_optimal()
+        if self.n <= HELD_KARP_MAX_LOCATIONS:
+            self.algorithm_used = 'held_karp'
+            return self._held_karp_optimal()
         else:
+            self.algorithm_used = 'nearest_neighbor_2opt'
             return self.solve_all_starting_points()
 
-    def _brute_force_optimal(self) -> Tuple[List[str], float]:
+    def _held_karp_optimal(self) -> Tuple[List[str], float]:
         """
-        Brute force solution for small TSP instances
+        Exact solution for small TSP instances using Held-Karp DP
 
         Returns:
             Tuple of (optimal path as location names, total distance)
         """
-        min_distance = float('inf')
-        best_path = None
+        if self.n < 2:
+            return [self.locations[0]] * 2 if self.n else [], 0.0
 
-        # Try all permutations starting from location 0
-        for perm in itertools.permutations(range(1, self.n)):
-            path = [0] + list(perm)
-            distance = self._calculate_path_distance(path)
+        path, min_distance = _held_karp(self.D)
+        optimal_path = [self.locations[i] for i in path]
 
-            if distance < min_distance:
-                min_distance = distance
-                best_path = path
+        return optimal_path, float(min_distance)
 
-        # Add return to start
-        best_path.append(0)
+    def _brute_force_optimal(self) -> Tuple[List[str], float]:
+        """
+        Exact solution for small TSP instances, searching all permutations
+        depth-first with branch-and-bound pruning. Not used by the routes
+        (solve_optimal runs Held-Karp); kept as a second exact solver.
+
+        Returns:
+            Tuple of (optimal path as location names, total distance)
+        """
+        if self.n < 2:
+            return [self.locations[0]] * 2 if self.n else [], 0.0
+
+        best_path, min_distance = _branch_and_bound(self.D)
+        min_distance = float(min_distance)
         optimal_path = [self.locations[i] for i in best_path]
 
         return optimal_path, min_distance
@@ -151,11 +641,12 @@ class TSPSolver:
         Returns:
             Total distance
         """
+        dm = self.distance_matrix
         total = 0.0
-        for i in range(len(path) - 1):
-            total += self.distance_matrix[path[i]][path[i + 1]]
+        for a, b in zip(path, path[1:]):
+            total += dm[a][b]
         # Add return to start
-        total += self.distance_matrix[path[-1]][path[0]]
+        total += dm[path[-1]][path[0]]
         return total
 
 
@@ -165,6 +656,11 @@ class DistanceMatrixCalculator:
     Calculate distance matrix using Google Distance Matrix API
     """
 
+    # Headers for Nominatim requests (policy requires a valid User-Agent)
+    nominatim_headers = {
+        'User-Agent': 'DistanceOptimalityProblem/1.0 (contact@example.com)'
+    }
+
     def __init__(self, api_key: str):
         """
         Initialize with Google API key
@@ -173,35 +669,50 @@ class DistanceMatrixCalculator:
             api_key: Google Distance Matrix API key
         """
         self.api_key = api_key
-        # Headers for Nominatim requests (policy requires a valid User-Agent)
-        self.nominatim_headers = {
-            'User-Agent': 'DistanceOptimalityProblem/1.0 (contact@example.com)'
-        }
+        # Pooled module-level session so connections outlive this instance
+        self.session = SESSION
         # Simple in-memory cache for geocoding to reduce Nominatim calls
         # Key: normalized location string -> (lat, lon)
         self._geocode_cache = {}
+        # Guards cache updates from the geocoding worker threads
+        self._cache_lock = threading.Lock()
+        # Set when the cache has entries not yet written to disk
+        self._cache_dirty = False
+        # Serializes geocode cache writes in this process (the file lock
+        # covers other workers where fcntl exists)
+        self._geocode_save_lock = threading.Lock()
+        # Recent OSRM response times (seconds), used to tune hedging
+        self._osrm_latencies = deque(maxlen=200)
         # Minimum delay between Nominatim requests (seconds) - INCREASED to avoid 403
         self._nominatim_delay = 2.0  # Was 1.0, increased due to rate limiting
-    # Photon (Komoot) autocomplete/geocoding endpoint and India bbox to bias results
-    # Use environment-configured PHOTON_URL where possible
-        self._photon_url = os.environ.get('PHOTON_URL', PHOTON_URL)
-        self._india_bbox = "68.0,6.5,97.5,35.5"
+        # Shared by all geocoding workers so Nominatim sees one paced client
+        self._nominatim_limiter = RateLimiter(self._nominatim_delay)
+        # Photon (Komoot) autocomplete/geocoding endpoint
+        # (PHOTON_URL already honors the environment override)
+        self._photon_url = PHOTON_URL
         # Disk cache path
         self._cache_path = os.path.join(os.path.dirname(__file__), 'geocode_cache.json')
         # Load cache from disk if present
-        try:
-            if os.path.isfile(self._cache_path):
-                with open(self._cache_path, 'r', encoding='utf-8') as fh:
-                    raw = json.load(fh)
-                    # Expect mapping str -> [lat, lon]
-                    for k, v in raw.items():
-                        if isinstance(v, list) and len(v) >= 2:
-                            self._geocode_cache[k] = (float(v[0]), float(v[1]))
-        except Exception as e:
-            print(f"Failed to load geocode cache: {e}")
-
-    def get_distance_matrix(self, locations: List[str]) -> (
-            List[List[float]]):
+        self._geocode_cache.update(self._read_geocode_cache_file())
+
+        # Distance matrix cache: whole matrices keyed by the sorted
+        # location set, plus per-pair distances so a changed location set
+        # only needs the new pairs looked up
+        self._matrix_cache_path = os.path.join(os.path.dirname(__file__), 'distance_matrix_cache.json')
+        self._matrix_cache = {'matrices': {}, 'pairs': {}}
+        self._merge_matrix_cache(self._read_matrix_cache_file())
+        self._prune_matrix_cache()
+        # Writes are batched: stores mark the cache dirty and a timer
+        # flushes it (see _schedule_matrix_flush)
+        self._matrix_dirty = False
+        self._matrix_flush_timer = None
+        # Recently used whole matrices, already decoded to arrays in sorted
+        # location order: key -> (sorted locations, ndarray, stored ts).
+        # Hits are also checked against MATRIX_CACHE_TTL_DAYS, so the memo
+        # never serves a matrix that has expired on disk.
+        self._matrix_memo = TTLCache(maxsize=256, ttl=min(24 * 3600, MATRIX_CACHE_TTL_DAYS * 86400))
+
+    def get_distance_matrix(self, locations: List[str]) -> np.ndarray:
         """
         Get distance matrix for given locations using Google Distance
         Matrix API
@@ -210,16 +721,39 @@ class DistanceMatrixCalculator:
             locations: List of location names
 
         Returns:
-            2D distance matrix in kilometers
+            n x n float64 array of distances in kilometers
         """
         # New approach: use Nominatim to geocode each location into lat/lon
         # then use OSRM table API to compute driving distances between all
         # coordinates in one request. This returns distances in meters.
         n = len(locations)
-        distance_matrix = [[0.0] * n for _ in range(n)]
+        norms = [loc.strip().lower() for loc in locations]
+
+        cached, missing = self._cached_distance_matrix(norms)
+        if not missing:
+            print(f"Distance matrix for {n} locations served from cache")
+            return cached
+        coords = None
+        # If only about one location is new, look up just its pairs
+        if len(missing) <= 2 * (n - 1) and len(missing) < n * (n - 1):
+            print(f"Reusing cached distances; looking up {len(missing)} missing pairs...")
+            try:
+                coords = self._geocode_locations_nominatim(locations)
+            except Exception as e:
+                print(f"❌ Geocoding failed: {e}")
+                print("\nAttempting Haversine fallback...")
+                return self._get_haversine_matrix(locations)
+            try:
+                self._fill_pairwise_distances(coords, missing, cached, locations)
+                if all(cached[i, j] < 999999.0 for i, j in missing):
+                    self._store_distance_matrix(norms, cached)
+                    return cached
+            except Exception as e:
+                print(f"Partial distance matrix lookup failed: {e}")
 
         try:
-            coords = self._geocode_locations_nominatim(locations)
+            if coords is None:
+                coords = self._geocode_locations_nominatim(locations)
             print(f"Geocoded {len(coords)} locations:")
             for i, (loc, (lat, lon)) in enumerate(zip(locations, coords)):
                 print(f"  [{i}] {loc} -> ({lat:.4f}, {lon:.4f})")
@@ -229,86 +763,59 @@ class DistanceMatrixCalculator:
             coord_pairs = ['{:.6f},{:.6f}'.format(lon, lat) for (lat, lon) in coords]
             coord_str = ';'.join(coord_pairs)
 
-            # Use configurable OSRM base URL
-            osrm_url = f'{OSRM_BASE_URL}/table/v1/driving/{coord_str}'
-            print(f"OSRM request URL: {osrm_url}")
-            params = {'annotations': 'distance'}
-            # Use retry/backoff helper
-            resp = self._requests_with_retries(osrm_url, params=params, timeout=30)
-            data = resp.json()
-            print(f"OSRM response code: {data.get('code')}, message: {data.get('message', 'N/A')}")
-
-            # If OSRM didn't return distances, log full response for debugging
-            if 'distances' not in data or data['distances'] is None:
-                print("OSRM table response (no distances):", resp.status_code, resp.text[:500])
+            table = self._osrm_table_distances(coord_str, n)
+
+            if table is None:
                 # As a fallback, perform pairwise route lookups for all pairs
                 print("Falling back to pairwise OSRM route lookups for all pairs...")
-                for i in range(n):
-                    for j in range(n):
-                        if i == j:
-                            distance_matrix[i][j] = 0.0
-                            continue
-                        try:
-                            lat1, lon1 = coords[i]
-                            lat2, lon2 = coords[j]
-                            route_url = f'{OSRM_BASE_URL}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}'
-                            route_resp = self._requests_with_retries(route_url, params={'overview': 'false'}, timeout=15, max_retries=3, backoff=0.5)
-                            route_data = route_resp.json()
-                            if route_data.get('code') == 'Ok' and 'routes' in route_data and route_data['routes']:
-                                dist_m = route_data['routes'][0].get('distance', None)
-                                if dist_m is not None:
-                                    distance_matrix[i][j] = float(dist_m) / 1000.0
-                                    continue
-                        except Exception as ex:
-                            print(f"Pairwise fallback failed for i={i} j={j}: {ex}")
-                        # If we get here, mark unreachable for now
-                        distance_matrix[i][j] = 999999.0
-
-            # OSRM returns distances in meters; convert to kilometers
-            has_nulls = False
-            for i in range(n):
-                for j in range(n):
-                    v = data['distances'][i][j]
-                    if v is None:
-                        has_nulls = True
-                        # unreachable; set a large value and log
-                        print(f"OSRM table: unreachable pair i={i} j={j}")
-                        distance_matrix[i][j] = 999999.0
-                    else:
-                        distance_matrix[i][j] = float(v) / 1000.0
-                        
+                # Unresolved pairs keep the unreachable sentinel
+                distance_matrix = np.full((n, n), 999999.0)
+                np.fill_diagonal(distance_matrix, 0.0)
+                if ASSUME_SYMMETRIC_DRIVING:
+                    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+                else:
+                    pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+                self._fill_pairwise_distances(coords, pairs, distance_matrix, locations,
+                                              max_retries=3, symmetric=ASSUME_SYMMETRIC_DRIVING)
+                self._store_distance_matrix(norms, distance_matrix)
+                return distance_matrix
+
+            # OSRM returns distances in meters; convert to kilometers in one
+            # vectorized pass. Null (unreachable) cells parse as nan.
+            km = np.array(table, dtype=np.float64) / 1000.0
+            null_mask = np.isnan(km)
+            # unreachable; set a large value and log
+            km[null_mask] = 999999.0
+            distance_matrix = km
+            unreachable = []
+            for i, j in zip(*np.nonzero(null_mask)):
+                print(f"OSRM table: unreachable pair i={i} j={j}")
+                if i != j:
+                    unreachable.append((int(i), int(j)))
+
             print(f"Distance matrix from OSRM table:")
             for i in range(n):
-                print(f"  {locations[i]}: {distance_matrix[i]}")
+                print(f"  {locations[i]}: {distance_matrix[i].tolist()}")
 
             # If we got nulls, try pairwise route lookups for missing pairs
-            if has_nulls:
-                print(f"Attempting pairwise OSRM route lookups for {sum(1 for i in range(n) for j in range(n) if i != j and distance_matrix[i][j] >= 999999.0)} unreachable pairs...")
-                count = 0
-                for i in range(n):
-                    for j in range(n):
-                        if i != j and distance_matrix[i][j] >= 999999.0:
-                            count += 1
-                            try:
-                                lat1, lon1 = coords[i]
-                                lat2, lon2 = coords[j]
-                                route_url = f'{OSRM_BASE_URL}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}'
-                                # try a couple of retries for pairwise queries
-                                route_resp = self._requests_with_retries(route_url, params={'overview': 'false'}, timeout=15, max_retries=4, backoff=0.5)
-                                route_data = route_resp.json()
-                                if route_data.get('code') == 'Ok' and 'routes' in route_data and route_data['routes']:
-                                    dist_m = route_data['routes'][0].get('distance', None)
-                                    if dist_m is not None:
-                                        distance_matrix[i][j] = float(dist_m) / 1000.0
-                                        print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]}: {distance_matrix[i][j]:.2f} km")
-                                    else:
-                                        print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]}: no distance in route")
-                                else:
-                                    print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]}: {route_data.get('code', 'error')} - {route_data.get('message', '')}")
-                            except Exception as ex:
-                                print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]} failed: {ex}")
-                                # Keep the sentinel value
-
+            if unreachable:
+                print(f"Attempting pairwise OSRM route lookups for {len(unreachable)} unreachable pairs...")
+                pairs = unreachable
+                if ASSUME_SYMMETRIC_DRIVING:
+                    # Reuse the reverse direction when the table has it and
+                    # look up each remaining unordered pair only once
+                    todo = []
+                    for i, j in pairs:
+                        if distance_matrix[j, i] < 999999.0:
+                            distance_matrix[i, j] = distance_matrix[j, i]
+                        elif i < j:
+                            todo.append((i, j))
+                    pairs = todo
+                # try a couple of retries for pairwise queries
+                self._fill_pairwise_distances(coords, pairs, distance_matrix, locations,
+                                              max_retries=4, symmetric=ASSUME_SYMMETRIC_DRIVING)
+
+            self._store_distance_matrix(norms, distance_matrix)
             return distance_matrix
 
         except Exception as e:
@@ -320,6 +827,303 @@ class DistanceMatrixCalculator:
             print("\nAttempting Haversine fallback...")
             return self._get_haversine_matrix(locations)
 
+    def _osrm_table_distances(self, coord_str: str, n: int) -> List[List[float]]:
+        """
+        Fetch the n x n OSRM distance table (meters) for the coordinates.
+        Tables larger than OSRM_TABLE_SPLIT_THRESHOLD are split by source
+        rows into sub-requests issued in parallel.
+
+        Returns:
+            n rows of distances (None for unreachable cells), or None if
+            OSRM returned no distances
+        """
+        # Path relative to the configured OSRM host(s)
+        osrm_path = OSRM_TABLE_PATH + coord_str
+        print(f"OSRM request URL: {OSRM_BASE_URL}{osrm_path}")
+        if n <= OSRM_TABLE_SPLIT_THRESHOLD:
+            return self._osrm_table_request(osrm_path, {'annotations': 'distance'})
+
+        chunks = [range(start, min(start + OSRM_TABLE_SPLIT_THRESHOLD, n))
+                  for start in range(0, n, OSRM_TABLE_SPLIT_THRESHOLD)]
+        print(f"Splitting OSRM table into {len(chunks)} source-row requests")
+        workers = max(1, min(OSRM_PARALLEL, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            blocks = list(executor.map(
+                lambda rows: self._osrm_table_request(osrm_path, {
+                    'annotations': 'distance',
+                    'sources': ';'.join(str(i) for i in rows),
+                }),
+                chunks
+            ))
+        if any(block is None for block in blocks):
+            return None
+        return [row for block in blocks for row in block]
+
+    def _osrm_table_request(self, osrm_path: str, params: dict) -> List[List[float]]:
+        """
+        Single OSRM table API call
+
+        Returns:
+            The 'distances' rows, or None if the response has none
+        """
+        # Use retry/backoff helper, hedged across OSRM hosts
+        resp = self._osrm_get(osrm_path, params=params, timeout=30)
+        data = _json_loads(resp.content)
+        print(f"OSRM response code: {data.get('code')}, message: {data.get('message', 'N/A')}")
+
+        # If OSRM didn't return distances, log full response for debugging
+        if 'distances' not in data or data['distances'] is None:
+            print("OSRM table response (no distances):", resp.status_code, resp.text[:500])
+            return None
+        return data['distances']
+
+    @staticmethod
+    def _matrix_cache_key(norms: List[str]) -> str:
+        """Cache key for a location set, independent of input order."""
+        return hashlib.sha1(json.dumps(sorted(norms)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _cache_entry_fresh(ts: float) -> bool:
+        return time.time() - ts < MATRIX_CACHE_TTL_DAYS * 86400
+
+    def _cached_distance_matrix(self, norms: List[str]) -> Tuple[
+            np.ndarray, List[Tuple[int, int]]]:
+        """
+        Build a distance matrix for the normalized locations from the cache
+
+        Returns:
+            Tuple of (matrix in input order, (i, j) pairs with no cached
+            distance). Missing cells hold the 999999.0 sentinel.
+        """
+        n = len(norms)
+        key = self._matrix_cache_key(norms)
+        with self._cache_lock:
+            memo = self._matrix_memo.get(key)
+            if memo is not None and not self._cache_entry_fresh(memo[2]):
+                del self._matrix_memo[key]
+                memo = None
+            if memo is None:
+                entry = self._matrix_cache['matrices'].get(key)
+                if entry is not None and self._cache_entry_fresh(entry['ts']):
+                    memo = (entry['locations'], np.asarray(entry['matrix'], dtype=np.float64),
+                            entry['ts'])
+                    self._matrix_memo[key] = memo
+            if memo is not None:
+                # Stored in sorted-location order; permute to input order.
+                # Fancy indexing copies, so callers never alias the cache.
+                sorted_locs, m, _ = memo
+                pos = {nm: k for k, nm in enumerate(sorted_locs)}
+                order = [pos[nm] for nm in norms]
+                return m[np.ix_(order, order)], []
+
+            pairs = self._matrix_cache['pairs']
+            matrix = np.zeros((n, n))
+            missing = []
+            for i, a in enumerate(norms):
+                row = pairs.get(a, {})
+                for j, b in enumerate(norms):
+                    if a == b:
+                        continue
+                    hit = row.get(b)
+                    if hit is not None and self._cache_entry_fresh(hit[1]):
+                        matrix[i, j] = hit[0]
+                    else:
+                        matrix[i, j] = 999999.0
+                        missing.append((i, j))
+        return matrix, missing
+
+    def _store_distance_matrix(self, norms: List[str],
+                               distance_matrix: np.ndarray) -> None:
+        """
+        Remember a computed matrix and its pair distances and persist the
+        cache. Unreachable (sentinel) cells are not cached, and a matrix
+        containing any is only kept pair by pair.
+        """
+        now = time.time()
+        complete = True
+        distance_matrix = np.asarray(distance_matrix, dtype=np.float64)
+        with self._cache_lock:
+            pairs = self._matrix_cache['pairs']
+            for i, a in enumerate(norms):
+                for j, b in enumerate(norms):
+                    if a == b:
+                        continue
+                    km = float(distance_matrix[i, j])
+                    if km >= 999999.0:
+                        complete = False
+                    else:
+                        pairs.setdefault(a, {})[b] = [km, now]
+            if complete:
+                order = sorted(range(len(norms)), key=lambda k: norms[k])
+                key = self._matrix_cache_key(norms)
+                sorted_locs = [norms[k] for k in order]
+                m = distance_matrix[np.ix_(order, order)]
+                self._matrix_memo[key] = (sorted_locs, m, now)
+                self._matrix_cache['matrices'][key] = {
+                    'locations': sorted_locs,
+                    'matrix': m.tolist(),
+                    'ts': now,
+                }
+            self._schedule_matrix_flush()
+
+    def _schedule_matrix_flush(self) -> None:
+        """Mark the matrix cache dirty and start a flush timer if none is
+        pending. Caller holds _cache_lock."""
+        self._matrix_dirty = True
+        if self._matrix_flush_timer is None:
+            timer = threading.Timer(MATRIX_CACHE_FLUSH_SECONDS, self.flush_matrix_cache)
+            timer.daemon = True
+            self._matrix_flush_timer = timer
+            timer.start()
+
+    def flush_matrix_cache(self) -> None:
+        """
+        Persist pending matrix cache changes. Entries other processes have
+        written since are merged in first (newest timestamp wins), expired
+        entries are dropped and the matrix count is capped.
+        """
+        with self._cache_lock:
+            self._matrix_flush_timer = None
+            if not self._matrix_dirty:
+                return
+            self._matrix_dirty = False
+        try:
+            with self._file_lock(self._matrix_cache_path):
+                on_disk = self._read_matrix_cache_file()
+                with self._cache_lock:
+                    self._merge_matrix_cache(on_disk)
+                    self._prune_matrix_cache()
+                    payload = _json_dumps(self._matrix_cache)
+                self._write_text_atomic(self._matrix_cache_path, payload)
+        except Exception as e:
+            print(f"Warning: failed to save distance matrix cache: {e}")
+
+    @contextmanager
+    def _file_lock(self, path: str):
+        """Exclusive lock on a cache file across processes (POSIX only)."""
+        if fcntl is None:
+            yield
+            return
+        with open(path + '.lock', 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _read_matrix_cache_file(self) -> dict:
+        """Contents of distance_matrix_cache.json, or an empty cache."""
+        try:
+            if os.path.isfile(self._matrix_cache_path):
+                with open(self._matrix_cache_path, 'r', encoding='utf-8') as fh:
+                    return _json_loads(fh.read())
+        except Exception as e:
+            print(f"Failed to load distance matrix cache: {e}")
+        return {'matrices': {}, 'pairs': {}}
+
+    def _merge_matrix_cache(self, other: dict) -> None:
+        """Merge another cache dict into ours, keeping the newer entry."""
+        matrices = self._matrix_cache['matrices']
+        for k, v in other.get('matrices', {}).items():
+            if k not in matrices or matrices[k]['ts'] < v.get('ts', 0):
+                matrices[k] = v
+        pairs = self._matrix_cache['pairs']
+        for a, row in other.get('pairs', {}).items():
+            mine = pairs.setdefault(a, {})
+            for b, v in row.items():
+                if b not in mine or mine[b][1] < v[1]:
+                    mine[b] = v
+
+    def _prune_matrix_cache(self) -> None:
+        """Drop expired entries and keep only the newest matrices and pair rows."""
+        matrices = {k: v for k, v in self._matrix_cache['matrices'].items()
+                    if self._cache_entry_fresh(v['ts'])}
+        if len(matrices) > MATRIX_CACHE_MAX_MATRICES:
+            newest = sorted(matrices, key=lambda k: matrices[k]['ts'], reverse=True)
+            matrices = {k: matrices[k] for k in newest[:MATRIX_CACHE_MAX_MATRICES]}
+        self._matrix_cache['matrices'] = matrices
+        pairs = {}
+        for a, row in self._matrix_cache['pairs'].items():
+            fresh = {b: v for b, v in row.items() if self._cache_entry_fresh(v[1])}
+            if fresh:
+                pairs[a] = fresh
+        if len(pairs) > MATRIX_CACHE_MAX_PAIR_ROWS:
+            newest = sorted(pairs, key=lambda a: max(v[1] for v in pairs[a].values()),
+                            reverse=True)
+            pairs = {a: pairs[a] for a in newest[:MATRIX_CACHE_MAX_PAIR_ROWS]}
+        self._matrix_cache['pairs'] = pairs
+
+    @staticmethod
+    def _write_text_atomic(path: str, text: str) -> None:
+        """
+        Write text to a temporary file and swap it in, so readers never
+        see a partial file.
+        """
+        # Unique per writer: requests and gunicorn workers may overlap
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                fh.write(text)
+            os.replace(tmp_path, path)
+        except Exception as _e:
+            print(f"Warning: failed to write {os.path.basename(path)}:", _e)
+
+    def _fetch_route_pair(self, origin: Tuple[float, float],
+                          destination: Tuple[float, float],
+                          max_retries: int = 3) -> float:
+        """
+        Driving distance between two (lat, lon) points via OSRM route API
+
+        Returns:
+            Distance in kilometers, or None if OSRM found no route
+        """
+        lat1, lon1 = origin
+        lat2, lon2 = destination
+        route_url = f'{OSRM_ROUTE_URL}{lon1},{lat1};{lon2},{lat2}'
+        route_resp = self._requests_with_retries(route_url, params=OSRM_PAIR_PARAMS, timeout=OSRM_PAIR_TIMEOUT, max_retries=max_retries, backoff=0.5)
+        route_data = _json_loads(route_resp.content)
+        if route_data.get('code') == 'Ok' and 'routes' in route_data and route_data['routes']:
+            dist_m = route_data['routes'][0].get('distance', None)
+            if dist_m is not None:
+                return float(dist_m) / 1000.0
+            print(f"OSRM route {origin} -> {destination}: no distance in route")
+        else:
+            print(f"OSRM route {origin} -> {destination}: {route_data.get('code', 'error')} - {route_data.get('message', '')}")
+        return None
+
+    def _fill_pairwise_distances(self, coords: List[Tuple[float, float]],
+                                 pairs: List[Tuple[int, int]],
+                                 distance_matrix: np.ndarray,
+                                 locations: List[str],
+                                 max_retries: int = 3,
+                                 symmetric: bool = False) -> None:
+        """
+        Look up driving distances for the given (i, j) index pairs
+        concurrently and write them into distance_matrix. Pairs that fail
+        keep their current value. With symmetric=True each result is also
+        written to [j][i].
+        """
+        if not pairs:
+            return
+        workers = max(1, min(OSRM_PARALLEL, len(pairs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._fetch_route_pair, coords[i], coords[j], max_retries): (i, j)
+                for (i, j) in pairs
+            }
+            for count, future in enumerate(as_completed(futures), start=1):
+                i, j = futures[future]
+                try:
+                    km = future.result()
+                except Exception as ex:
+                    print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]} failed: {ex}")
+                    continue
+                if km is not None:
+                    distance_matrix[i][j] = km
+                    if symmetric:
+                        distance_matrix[j][i] = km
+                    print(f"  [{count}] Pairwise {locations[i]} -> {locations[j]}: {km:.2f} km")
+
     def _fetch_batch_distances(self, origins: List[str],
                                 destinations: List[str]) -> List[
                                     List[float]]:
@@ -341,131 +1145,166 @@ class DistanceMatrixCalculator:
         """
         Geocode a list of location strings using Nominatim (OpenStreetMap)
 
-        Returns list of (lat, lon) tuples. Raises if any location cannot be
-        geocoded.
+        Cached locations are served from memory; the rest are geocoded
+        concurrently. Returns list of (lat, lon) tuples in input order.
+        Raises if any location cannot be geocoded.
         """
-        coords = []
-        for loc in locations:
+        coords = [None] * len(locations)
+        # normalized location -> indices still waiting for coordinates
+        missing = {}
+        for idx, loc in enumerate(locations):
             norm = loc.strip().lower()
             # Check cache first
             if norm in self._geocode_cache:
-                coords.append(self._geocode_cache[norm])
-                continue
+                coords[idx] = self._geocode_cache[norm]
+            else:
+                missing.setdefault(norm, []).append(idx)
 
-            # Try a couple of query variants and use retries
-            tried = []
-            success = False
-            # First, try Photon (better for autocomplete/geocoding, less strict rate limits)
+        if missing:
+            workers = max(1, min(GEOCODE_PARALLEL, len(missing)))
             try:
-                p_params = {'q': loc, 'limit': 1, 'lang': 'en', 'bbox': self._india_bbox}
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self._geocode_one, locations[idxs[0]]): idxs
+                        for idxs in missing.values()
+                    }
+                    for future in as_completed(futures):
+                        latlon = future.result()
+                        for idx in futures[future]:
+                            coords[idx] = latlon
+            finally:
+                # Persist whatever was resolved, once per call
+                self._save_geocode_cache()
+
+        return coords
+
+    def _remember_geocode(self, norm: str, lat: float, lon: float) -> None:
+        """Store a geocoding result in the in-memory cache."""
+        with self._cache_lock:
+            self._geocode_cache[norm] = (lat, lon)
+            self._cache_dirty = True
+
+    def _read_geocode_cache_file(self) -> dict:
+        """Contents of geocode_cache.json as norm -> (lat, lon)."""
+        cache = {}
+        try:
+            if os.path.isfile(self._cache_path):
+                with open(self._cache_path, 'r', encoding='utf-8') as fh:
+                    raw = _json_loads(fh.read())
+                    # Expect mapping str -> [lat, lon]
+                    for k, v in raw.items():
+                        if isinstance(v, list) and len(v) >= 2:
+                            cache[k] = (float(v[0]), float(v[1]))
+        except Exception as e:
+            print(f"Failed to load geocode cache: {e}")
+        return cache
+
+    def _save_geocode_cache(self) -> None:
+        """
+        Write the geocode cache to disk if it changed. Entries other
+        processes have written since are merged in first, and the snapshot
+        is taken under the file lock so a stale one never lands last.
+        """
+        with self._cache_lock:
+            if not self._cache_dirty:
+                return
+            self._cache_dirty = False
+        try:
+            with self._geocode_save_lock, self._file_lock(self._cache_path):
+                on_disk = self._read_geocode_cache_file()
+                with self._cache_lock:
+                    for k, v in on_disk.items():
+                        self._geocode_cache.setdefault(k, v)
+                    payload = _json_dumps({k: [v[0], v[1]] for k, v in self._geocode_cache.items()})
+                self._write_text_atomic(self._cache_path, payload)
+        except Exception as e:
+            print(f"Warning: failed to save geocode cache: {e}")
+
+    def _geocode_one(self, loc: str) -> Tuple[float, float]:
+        """
+        Geocode a single location: Photon first, then Photon and Nominatim
+        query variants with retries
+
+        Returns (lat, lon). Raises if the location cannot be geocoded.
+        """
+        norm = loc.strip().lower()
+        # Try a couple of query variants and use retries
+        tried = []
+        # First, try Photon (better for autocomplete/geocoding, less strict rate limits)
+        try:
+            p_params = PHOTON_GEOCODE_PARAMS + (('q', loc),)
+            pr = self._requests_with_retries(self._photon_url, params=p_params, timeout=8, max_retries=2, backoff=0.2)
+            pjson = pr.json()
+            features = pjson.get('features', []) if isinstance(pjson, dict) else []
+            if features:
+                f0 = features[0]
+                geom = f0.get('geometry', {})
+                coords_arr = geom.get('coordinates', None)
+                if coords_arr and len(coords_arr) >= 2:
+                    lon = float(coords_arr[0]); lat = float(coords_arr[1])
+                    self._remember_geocode(norm, lat, lon)
+                    print(f"Geocoded '{loc}' via Photon -> ({lat:.4f}, {lon:.4f})")
+                    return (lat, lon)
+        except Exception as ex:
+            # Photon failed for this query; we'll fall back to Nominatim below
+            tried.append((loc, 'photon_error', str(ex)))
+        # Try multiple query variants using Photon first (avoid Nominatim rate limits)
+        variants = [
+            loc,
+            f"{loc}, India",
+            f"{loc}, Maharashtra, India",
+            f"{loc}, Karnataka, India",
+            f"{loc}, Goa, India"
+        ]
+        for q in variants:
+            try:
+                p_params = PHOTON_GEOCODE_PARAMS + (('q', q),)
                 pr = self._requests_with_retries(self._photon_url, params=p_params, timeout=8, max_retries=2, backoff=0.2)
                 pjson = pr.json()
                 features = pjson.get('features', []) if isinstance(pjson, dict) else []
+                tried.append((q, getattr(pr, 'status_code', None), len(features)))
                 if features:
                     f0 = features[0]
                     geom = f0.get('geometry', {})
                     coords_arr = geom.get('coordinates', None)
                     if coords_arr and len(coords_arr) >= 2:
                         lon = float(coords_arr[0]); lat = float(coords_arr[1])
-                        coords.append((lat, lon))
-                        self._geocode_cache[norm] = (lat, lon)
-                        try:
-                            with open(self._cache_path, 'w', encoding='utf-8') as fh:
-                                json.dump({k: [v[0], v[1]] for k, v in self._geocode_cache.items()}, fh)
-                        except Exception:
-                            pass
-                        # Photon is fast; small sleep to be polite
-                        time.sleep(0.05)
-                        print(f"Geocoded '{loc}' via Photon -> ({lat:.4f}, {lon:.4f})")
-                        success = True
+                        self._remember_geocode(norm, lat, lon)
+                        print(f"Geocoded '{loc}' via Photon variant '{q}' -> ({lat:.4f}, {lon:.4f})")
+                        return (lat, lon)
             except Exception as ex:
-                # Photon failed for this query; we'll fall back to Nominatim below
-                tried.append((loc, 'photon_error', str(ex)))
-            # If Photon succeeded, skip Nominatim variants
-            if success:
-                continue
-            # Try multiple query variants using Photon first (avoid Nominatim rate limits)
-            variants = [
-                loc,
-                f"{loc}, India",
-                f"{loc}, Maharashtra, India",
-                f"{loc}, Karnataka, India",
-                f"{loc}, Goa, India"
-            ]
-            for q in variants:
-                try:
-                    p_params = {'q': q, 'limit': 1, 'lang': 'en', 'bbox': self._india_bbox}
-                    pr = self._requests_with_retries(self._photon_url, params=p_params, timeout=8, max_retries=2, backoff=0.2)
-                    pjson = pr.json()
-                    features = pjson.get('features', []) if isinstance(pjson, dict) else []
-                    tried.append((q, getattr(pr, 'status_code', None), len(features)))
-                    if features:
-                        f0 = features[0]
-                        geom = f0.get('geometry', {})
-                        coords_arr = geom.get('coordinates', None)
-                        if coords_arr and len(coords_arr) >= 2:
-                            lon = float(coords_arr[0]); lat = float(coords_arr[1])
-                            coords.append((lat, lon))
-                            self._geocode_cache[norm] = (lat, lon)
-                            try:
-                                with open(self._cache_path, 'w', encoding='utf-8') as fh:
-                                    json.dump({k: [v[0], v[1]] for k, v in self._geocode_cache.items()}, fh)
-                            except Exception:
-                                pass
-                            time.sleep(0.05)
-                            print(f"Geocoded '{loc}' via Photon variant '{q}' -> ({lat:.4f}, {lon:.4f})")
-                            success = True
-                            break
-                except Exception as ex:
-                    tried.append((q, 'photon_variant_error', str(ex)))
-
-            # If Photon variants didn't find anything, fall back to Nominatim variants
-            if success:
-                continue
-            for q in variants:
-                try:
-                    params = {'q': q, 'format': 'json', 'addressdetails': 1, 'limit': 1, 'countrycodes': 'in'}
-                    r = self._requests_with_retries(NOMINATIM_SEARCH_URL, params=params, timeout=15, max_retries=2, backoff=2.0)
-                    results = r.json()
-                    tried.append((q, getattr(r, 'status_code', None), len(results) if results else 0))
-                    if results:
-                        first = results[0]
-                        lat = float(first['lat'])
-                        lon = float(first['lon'])
-                        coords.append((lat, lon))
-                        # store in cache and persist
-                        self._geocode_cache[norm] = (lat, lon)
-                        print(f"Geocoded '{loc}' -> ({lat:.4f}, {lon:.4f}) using query: '{q}'")
-                        try:
-                            with open(self._cache_path, 'w', encoding='utf-8') as fh:
-                                json.dump({k: [v[0], v[1]] for k, v in self._geocode_cache.items()}, fh)
-                        except Exception as _e:
-                            print("Warning: failed to write geocode cache:", _e)
-                        time.sleep(self._nominatim_delay)
-                        success = True
-                        break
-                    else:
-                        # No results for this query, wait before trying next variant
-                        time.sleep(self._nominatim_delay)
-                except Exception as ex:
-                    # record and try next variant
-                    error_msg = str(ex)
-                    tried.append((q, error_msg, 0))
-                    # If we hit a 403, wait longer before next attempt
-                    if '403' in error_msg or 'Forbidden' in error_msg:
-                        print(f"⚠️ Nominatim rate limit hit for '{q}'. Waiting 5 seconds...")
-                        time.sleep(5.0)
-                    else:
-                        time.sleep(self._nominatim_delay)
-            if not success:
-                # If still not found, raise with details
-                print(f"Failed to geocode '{loc}'. All attempts: {tried}")
-                raise Exception(f"Failed to geocode '{loc}'. Attempts: {len(tried)}")
-
-        return coords
+                tried.append((q, 'photon_variant_error', str(ex)))
 
-    def _get_haversine_matrix(self, locations: List[str]) -> (
-            List[List[float]]):
+        # If Photon variants didn't find anything, fall back to Nominatim variants
+        for q in variants:
+            try:
+                params = NOMINATIM_GEOCODE_PARAMS + (('q', q),)
+                self._nominatim_limiter.wait()
+                r = self._requests_with_retries(NOMINATIM_SEARCH_URL, params=params, timeout=15, max_retries=2, backoff=2.0)
+                results = r.json()
+                tried.append((q, getattr(r, 'status_code', None), len(results) if results else 0))
+                if results:
+                    first = results[0]
+                    lat = float(first['lat'])
+                    lon = float(first['lon'])
+                    # store in cache and persist
+                    self._remember_geocode(norm, lat, lon)
+                    print(f"Geocoded '{loc}' -> ({lat:.4f}, {lon:.4f}) using query: '{q}'")
+                    return (lat, lon)
+            except Exception as ex:
+                # record and try next variant
+                error_msg = str(ex)
+                tried.append((q, error_msg, 0))
+                # If we hit a 403, wait longer before next attempt
+                if '403' in error_msg or 'Forbidden' in error_msg:
+                    print(f"⚠️ Nominatim rate limit hit for '{q}'. Waiting 5 seconds...")
+                    time.sleep(5.0)
+
+        # If still not found, raise with details
+        print(f"Failed to geocode '{loc}'. All attempts: {tried}")
+        raise Exception(f"Failed to geocode '{loc}'. Attempts: {len(tried)}")
+
+    def _get_haversine_matrix(self, locations: List[str]) -> np.ndarray:
         """
         Fallback: Calculate distances using Haversine formula
         (requires geocoding). This is a simplified fallback - in
@@ -479,23 +1318,15 @@ class DistanceMatrixCalculator:
         """
         # Fallback: attempt to geocode and compute Haversine distances
         try:
-            coords = self._geocode_locations_nominatim(locations)
-            n = len(coords)
-            matrix = [[0.0] * n for _ in range(n)]
-            for i in range(n):
-                lat1, lon1 = coords[i]
-                for j in range(n):
-                    if i == j:
-                        matrix[i][j] = 0.0
-                    else:
-                        lat2, lon2 = coords[j]
-                        matrix[i][j] = self._haversine_km(lat1, lon1, lat2, lon2)
-            return matrix
+            coords = np.asarray(self._geocode_locations_nominatim(locations), dtype=np.float64)
+            return haversine_matrix(coords[:, 0], coords[:, 1])
         except Exception as e:
             print(f"Haversine fallback failed geocoding: {e}")
             # final fallback: keep previous dummy but make it clearly wrong-large
             n = len(locations)
-            return [[0.0 if i == j else 999999.0 for j in range(n)] for i in range(n)]
+            dummy = np.full((n, n), 999999.0)
+            np.fill_diagonal(dummy, 0.0)
+            return dummy
 
     def _haversine_km(self, lat1, lon1, lat2, lon2):
         # Haversine formula to compute great-circle distance
@@ -508,15 +1339,80 @@ class DistanceMatrixCalculator:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c
 
-    def _requests_with_retries(self, url, params=None, timeout=30, max_retries=3, backoff=1.0, **kwargs):
+    def _osrm_get(self, path: str, params=None, timeout=30, **kwargs):
+        """
+        OSRM GET via _requests_with_retries, hedged across hosts.
+
+        The request goes to OSRM_BASE_URL first. If a backup host is
+        configured in OSRM_BASE_URLS and the primary has not answered
+        within the hedge delay (or failed), the same request is sent to the
+        first backup only and whichever answers first is returned. Once one copy wins,
+        the other stops retrying.
+        """
+        backups = [u for u in OSRM_BASE_URLS if u != OSRM_BASE_URL]
+        if not backups:
+            return self._timed_osrm_request(OSRM_BASE_URL + path, params, timeout, **kwargs)
+
+        settled = threading.Event()
+        primary = _HEDGE_PRIMARY_POOL.submit(self._timed_osrm_request, OSRM_BASE_URL + path,
+                                             params, timeout, abandon=settled, **kwargs)
+        delay = self._hedge_delay()
+        done, _ = wait([primary], timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        print(f"OSRM primary slow or failing after {delay * 1000:.0f} ms; hedging to {backups[0]}")
+        # Separate pool: backups must not queue behind the slow primaries
+        # they are meant to bypass
+        backup = _HEDGE_BACKUP_POOL.submit(self._timed_osrm_request, backups[0] + path,
+                                           params, timeout, abandon=settled, **kwargs)
+        pending = {backup} if done else {primary, backup}
+        error = primary.exception() if done else None
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    # Loser is dropped (cancelled if it has not started yet)
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+            raise error
+        finally:
+            # The loser finishes its current attempt but does not retry
+            settled.set()
+
+    def _timed_osrm_request(self, url, params, timeout, abandon=None, **kwargs):
+        """_requests_with_retries that records successful OSRM latencies."""
+        started = time.monotonic()
+        resp = self._requests_with_retries(url, params=params, timeout=timeout,
+                                           abandon=abandon, **kwargs)
+        self._osrm_latencies.append(time.monotonic() - started)
+        return resp
+
+    def _hedge_delay(self) -> float:
+        """
+        Seconds to wait on the primary OSRM host before hedging: the p95 of
+        recent latencies once enough samples exist, else OSRM_HEDGE_DELAY_MS.
+        """
+        samples = list(self._osrm_latencies)
+        if len(samples) >= 20:
+            return float(np.percentile(samples, 95))
+        return OSRM_HEDGE_DELAY_MS / 1000.0
+
+    def _requests_with_retries(self, url, params=None, timeout=30, max_retries=3, backoff=1.0,
+                               abandon=None, **kwargs):
         """
         Simple requests.get wrapper with retries and exponential backoff.
-        Returns requests.Response or raises the last exception.
+        Returns requests.Response or raises the last exception. If the
+        optional `abandon` event is set, no further attempts are made.
         """
         attempt = 0
         while True:
             try:
-                r = requests.get(url, params=params, timeout=timeout, **kwargs)
+                r = self.session.get(url, params=params, timeout=timeout, **kwargs)
                 # If status code is 429 or 5xx, consider retrying
                 if r.status_code == 429 or 500 <= r.status_code < 600:
                     raise requests.HTTPError(f"Status {r.status_code}")
@@ -524,7 +1420,7 @@ class DistanceMatrixCalculator:
                 return r
             except Exception as e:
                 attempt += 1
-                if attempt >= max_retries:
+                if attempt >= max_retries or (abandon is not None and abandon.is_set()):
                     print(
                         "Request failed after {} attempts to {}: {}".format(
                             attempt, url, e
@@ -533,15 +1429,57 @@ class DistanceMatrixCalculator:
                     raise
                 # exponential backoff with jitter
                 sleep_for = backoff * (2 ** (attempt - 1))
-                jitter = (0.5 - os.urandom(1)[0] / 255.0) * 0.5 * sleep_for
+                jitter = (random.random() - 0.5) * sleep_for
                 sleep_total = max(0.5, sleep_for + jitter)
                 print(
                     "Request failed (attempt {}) to {}: {}. Retrying in {:.1f}s".format(
                         attempt, url, e, sleep_total
                     )
                 )
-                time.sleep(sleep_total)
-
+                if abandon is not None:
+                    if abandon.wait(sleep_total):
+                        raise
+                else:
+                    time.sleep(sleep_total)
+
+
+# Threads running hedged OSRM requests. Backup copies get their own pool
+# so they still start when slow primaries occupy every primary thread.
+_HEDGE_PRIMARY_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix='osrm-primary')
+_HEDGE_BACKUP_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix='osrm-backup')
+
+# Shared calculator: keeps the geocode/matrix caches warm in memory across
+# requests instead of reloading them from disk for every call
+_CALC = DistanceMatrixCalculator(GOOGLE_API_KEY)
+# Don't lose matrices still waiting on the flush timer at shutdown
+atexit.register(_CALC.flush_matrix_cache)
+
+# Autocomplete suggestions keyed by (normalized query, limit); users retype
+# the same prefixes constantly, so repeats skip Photon/Nominatim entirely
+_AC_CACHE = TTLCache(maxsize=4096, ttl=3600)
+_AC_CACHE_LOCK = threading.Lock()
+# Lets browsers reuse a suggestion list for repeated keystrokes too
+AC_CACHE_CONTROL = 'public, max-age=600'
+# Lookups in progress by cache key, so concurrent identical queries share
+# one upstream call (guarded by _AC_CACHE_LOCK)
+_AC_INFLIGHT = {}
+# Seconds a duplicate request waits on the in-flight lookup before making
+# its own
+AC_INFLIGHT_WAIT = 10
+
+
+def _autocomplete_key(q, limit):
+    return (q.strip().lower(), limit)
+
+
+def _autocomplete_response(key, suggestions):
+    """Cache suggestions under `key` and return them as a cacheable response."""
+    if key is not None:
+        with _AC_CACHE_LOCK:
+            _AC_CACHE[key] = suggestions
+    resp = jsonify({'suggestions': suggestions})
+    resp.headers['Cache-Control'] = AC_CACHE_CONTROL
+    return resp
 
 
 @app.route('/')
@@ -596,11 +1534,11 @@ def search_location():
         return jsonify({'error': 'Query parameter q is required'}), 400
 
     url = NOMINATIM_SEARCH_URL
-    params = {'q': q, 'format': 'json', 'addressdetails': 1, 'limit': 1}
-    headers = {'User-Agent': 'DistanceOptimalityProblem/1.0 (contact@example.com)'}
+    params = NOMINATIM_SEARCH_PARAMS + (('q', q),)
 
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=15)
+        # SESSION sends the User-Agent Nominatim's usage policy requires
+        r = SESSION.get(url, params=params, timeout=15)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
@@ -636,26 +1574,58 @@ def autocomplete():
     except Exception:
         limit = 12
 
+    key = _autocomplete_key(q, limit)
+    with _AC_CACHE_LOCK:
+        cached = _AC_CACHE.get(key)
+        leader = False
+        if cached is None:
+            # Join an identical lookup already in progress, or lead one
+            inflight = _AC_INFLIGHT.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _AC_INFLIGHT[key] = Future()
+    if cached is not None:
+        return _autocomplete_response(None, cached)
+
+    if not leader:
+        try:
+            return _autocomplete_response(None, inflight.result(timeout=AC_INFLIGHT_WAIT))
+        except Exception as e:
+            # Leader failed or is slow; look it up independently
+            print(f"Coalesced autocomplete for '{q}' not served: {e!r}")
+            try:
+                return _autocomplete_response(key, _autocomplete_suggestions(q, limit))
+            except Exception as ex:
+                return jsonify({'error': 'Autocomplete request failed', 'detail': str(ex)}), 502
+
+    try:
+        suggestions = _autocomplete_suggestions(q, limit)
+    except Exception as e:
+        inflight.set_exception(e)
+        return jsonify({'error': 'Autocomplete request failed', 'detail': str(e)}), 502
+    else:
+        # Cache before releasing waiters so later requests hit the cache
+        resp = _autocomplete_response(key, suggestions)
+        inflight.set_result(suggestions)
+        return resp
+    finally:
+        with _AC_CACHE_LOCK:
+            _AC_INFLIGHT.pop(key, None)
+
+
+def _autocomplete_suggestions(q, limit):
+    """
+    Look up suggestions from Photon, falling back to Nominatim
+
+    Raises if both services fail.
+    """
     # Use Photon API (Komoot) - optimized for autocomplete, fewer rate limits
     photon_url = PHOTON_URL
-    
-    # Bbox for India (approx) to bias results to India
-    # Format: lon_min,lat_min,lon_max,lat_max
-    india_bbox = "68.0,6.5,97.5,35.5"
-    
-    params = {
-        'q': q,
-        'limit': limit,
-        'lang': 'en',
-        'bbox': india_bbox
-    }
-    
-    headers = {
-        'User-Agent': 'DistanceOptimalityProblem/1.0 (contact@example.com)'
-    }
+    # India-biased Photon params with the requested result count
+    params = PHOTON_BASE_PARAMS + (('q', q), ('limit', limit))
 
     try:
-        resp = requests.get(photon_url, params=params, headers=headers, timeout=10)
+        resp = SESSION.get(photon_url, params=params, timeout=10)
         resp.raise_for_status()
         data = resp.json()
     except Exception as e:
@@ -704,29 +1674,22 @@ def autocomplete():
             print(f"Error parsing Photon feature: {ex}")
             continue
 
-    return jsonify({'suggestions': suggestions})
+    return suggestions
 
 
 def autocomplete_nominatim_fallback(q, limit=8):
-    """Fallback to Nominatim if Photon fails."""
-    calc = DistanceMatrixCalculator(GOOGLE_API_KEY)
+    """Fallback to Nominatim if Photon fails. Returns the suggestions list."""
     url = NOMINATIM_SEARCH_URL
-    params = {
-        'q': q,
-        'format': 'json',
-        'addressdetails': 1,
-        'limit': limit,
-        'countrycodes': 'in'
-    }
+    params = NOMINATIM_BASE_PARAMS + (('q', q), ('limit', limit))
 
     try:
-        resp = calc._requests_with_retries(url, params=params, timeout=10,
-                                           max_retries=2, backoff=0.4,
-                                           headers=calc.nominatim_headers)
+        resp = _CALC._requests_with_retries(url, params=params, timeout=10,
+                                            max_retries=2, backoff=0.4,
+                                            headers=_CALC.nominatim_headers)
         results = resp.json()
     except Exception as e:
         print(f"Nominatim fallback error for '{q}': {e}")
-        return jsonify({'error': 'Autocomplete request failed', 'detail': str(e)}), 502
+        raise
 
     suggestions = []
     for r in results:
@@ -740,7 +1703,7 @@ def autocomplete_nominatim_fallback(q, limit=8):
         except Exception:
             continue
 
-    return jsonify({'suggestions': suggestions})
+    return suggestions
 
 
 # ---------- 2 Haversine Distance (quick approx) ----------
@@ -754,6 +1717,58 @@ def haversine(lat1, lon1, lat2, lon2):
     return round(R * 2 * math.asin(math.sqrt(a)), 2)
 
 
+@njit(fastmath=True, cache=True)
+def _hv(lat1, lon1, lat2, lon2):
+    """Great-circle distance (km) between two points given in radians"""
+    a = (math.sin((lat2 - lat1) / 2.0) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2 * 6371.0 * math.asin(math.sqrt(min(1.0, a)))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _hv_matrix(lat, lon, out):
+    """Fill ``out`` with pairwise distances (km) for radian lat/lon arrays"""
+    n = lat.shape[0]
+    for i in prange(n):
+        out[i, i] = 0.0
+        for j in range(i + 1, n):
+            d = _hv(lat[i], lon[i], lat[j], lon[j])
+            out[i, j] = d
+            out[j, i] = d
+
+
+def haversine_matrix(lats, lons) -> np.ndarray:
+    """
+    Pairwise great-circle distances (km) between all points
+
+    Args:
+        lats: Latitudes in degrees, shape (n,)
+        lons: Longitudes in degrees, shape (n,)
+
+    Returns:
+        Symmetric n x n float64 matrix with a zero diagonal
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    n = lat.shape[0]
+    if NUMBA_AVAILABLE:
+        out = np.empty((n, n))
+        _hv_matrix(lat, lon, out)
+        return out
+    # Distance is symmetric: evaluate the upper triangle in one vectorized
+    # pass and mirror it
+    iu, ju = np.triu_indices(n, 1)
+    dlat = lat[ju] - lat[iu]
+    dlon = lon[ju] - lon[iu]
+    a = (np.sin(dlat / 2.0) ** 2 +
+         np.cos(lat[iu]) * np.cos(lat[ju]) * np.sin(dlon / 2.0) ** 2)
+    d = 2 * 6371.0 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    matrix = np.zeros((n, n))
+    matrix[iu, ju] = d
+    matrix[ju, iu] = d
+    return matrix
+
+
 @app.route('/distance')
 def get_distance():
     """ Calculates teh distance between the locations/places using the variables and values based on latitude and longitude"""
@@ -781,14 +1796,13 @@ def route():
     except Exception:
         return jsonify({'error': 'lat1, lon1, lat2, lon2 query params required and must be floats'}), 400
 
-    osrm_url = f'{OSRM_BASE_URL}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}'
-    params = {'overview': 'full', 'geometries': 'geojson'}
+    osrm_path = f'{OSRM_ROUTE_PATH}{lon1},{lat1};{lon2},{lat2}'
+    params = OSRM_GEOMETRY_PARAMS
 
     try:
-        # Use DistanceMatrixCalculator helper for retries/backoff
-        calculator = DistanceMatrixCalculator(GOOGLE_API_KEY)
-        resp = calculator._requests_with_retries(osrm_url, params=params, timeout=20)
-        data = resp.json()
+        # Use DistanceMatrixCalculator helper for retries/backoff and hedging
+        resp = _CALC._osrm_get(osrm_path, params=params, timeout=20)
+        data = _json_loads(resp.content)
     except Exception as e:
         print(f"OSRM routing error: {e}")
         return jsonify({'error': 'Routing request failed', 'detail': str(e)}), 502
@@ -812,7 +1826,8 @@ def nearest_neighbor_route():
     Request JSON:
       { "locations": [..], "start_index": optional int }
 
-    Returns the NN path (indices and location names) and total distance.
+    Returns the NN path refined by 2-opt (indices and location names) and
+    its total distance.
     """
     try:
         data = request.get_json()
@@ -829,24 +1844,22 @@ def nearest_neighbor_route():
                 start_index = int(start_index)
             except Exception:
                 start_index = None
+        if start_index is not None and not 0 <= start_index < len(locations):
+            return jsonify({'error': f'start_index must be between 0 and {len(locations) - 1}'}), 400
 
-        calculator = DistanceMatrixCalculator(GOOGLE_API_KEY)
-        distance_matrix = calculator.get_distance_matrix(locations)
+        distance_matrix = _CALC.get_distance_matrix(locations)
 
         solver = TSPSolver(locations, distance_matrix)
         if start_index is None:
-            # Try all starting points and return best
-            best_path = None
-            best_distance = float('inf')
-            for si in range(len(locations)):
-                path_idx, dist = solver.nearest_neighbor(si)
-                if dist < best_distance:
-                    best_distance = dist
-                    best_path = path_idx
-            path_indices = best_path
-            total_distance = best_distance
+            # Try all starting points (in one batched sweep) and return best
+            paths, totals = solver.nearest_neighbor_all_starts()
+            best = int(totals.argmin())
+            path_indices = paths[best].tolist()
+            total_distance = float(totals[best])
         else:
             path_indices, total_distance = solver.nearest_neighbor(start_index)
+        # 2-opt keeps the start and only ever shortens the tour
+        path_indices, total_distance = solver.two_opt(path_indices)
 
         path_names = [locations[i] for i in path_indices]
         return jsonify({
@@ -903,8 +1916,7 @@ def calculate_route():
         print(f"Calculating route for {len(locations)} locations...")
 
         # Step 1: Get distance matrix from Google API
-        calculator = DistanceMatrixCalculator(GOOGLE_API_KEY)
-        distance_matrix = calculator.get_distance_matrix(locations)
+        distance_matrix = _CALC.get_distance_matrix(locations)
 
         print("Distance matrix calculated successfully")
 
@@ -916,22 +1928,18 @@ def calculate_route():
 
         # Step 3: Also include coordinates used for each location (lat, lon)
         try:
-            coords = calculator._geocode_locations_nominatim(locations)
+            coords = _CALC._geocode_locations_nominatim(locations)
         except Exception:
             coords = []
 
         # Step 4: Return results
-        algorithm = (
-            'brute_force' if len(locations) <= 10
-            else 'nearest_neighbor'
-        )
         return jsonify({
             'locations': locations,
             'optimal_path': optimal_path,
             'total_distance': total_distance,
             'distance_matrix': distance_matrix,
             'coords': coords,
-            'algorithm_used': algorithm
+            'algorithm_used': solver.algorithm_used
         })
 
     except Exception as e:
@@ -8,6 +8,14 @@ from dotenv import load_dotenv
 import requests
 import json
 
+# /calculate-route responses carry the distance matrix and route geometry;
+# parse them with orjson when it is installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # Load .env for local development
 load_dotenv()
 
@@ -52,7 +60,7 @@ def test_health_endpoint():
         response = requests.get(f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             print_success("Health endpoint is working")
-            print_info(f"Response: {response.json()}")
+            print_info(f"Response: {_loads(response.content)}")
             return True
         else:
             print_error(f"Health endpoint returned status: {response.status_code}")
@@ -69,7 +77,7 @@ def test_home_endpoint():
         response = requests.get(BASE_URL, timeout=5)
         if response.status_code == 200:
             print_success("Home endpoint is working")
-            data = response.json()
+            data = _loads(response.content)
             print_info(f"API Version: {data.get('version')}")
             print_info(f"Available endpoints: {len(data.get('endpoints', {}))}")
             return True
@@ -102,7 +110,7 @@ def test_calculate_route_basic():
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             print_success("Route calculation successful")
             print_info(f"Locations: {len(data.get('locations', []))}")
             print_info(f"Total Distance: {data.get('total_distance', 0):.2f} km")
@@ -145,7 +153,7 @@ def test_calculate_route_multiple():
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             print_success("Route calculation successful")
             print_info(f"Locations: {len(data.get('locations', []))}")
             print_info(f"Total Distance: {data.get('total_distance', 0):.2f} km")
@@ -184,7 +192,7 @@ def test_error_handling():
         
         if response.status_code == 400:
             print_success("Error handling works correctly")
-            print_info(f"Error message: {response.json().get('error')}")
+            print_info(f"Error message: {_loads(response.content).get('error')}")
             return True
         else:
             print_error("Expected 400 error, but got different response")
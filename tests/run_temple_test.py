@@ -2,6 +2,14 @@ import requests
 import json
 import sys
 
+# /calculate-route responses carry the distance matrix and route geometry;
+# parse them with orjson when it is installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 BACKEND = 'http://localhost:5000'
 
 LOCATIONS = [
@@ -28,7 +36,7 @@ def check_autocomplete(loc):
         q = loc.split(',')[0]
         r = requests.get(f"{BACKEND}/autocomplete", params={"q": q, "limit": 6}, timeout=10)
         r.raise_for_status()
-        return r.json()
+        return _loads(r.content)
     except Exception as e:
         return {"error": str(e)}
 
@@ -45,12 +53,12 @@ def run_test():
     if r.status_code != 200:
         print('Backend returned status', r.status_code)
         try:
-            pretty_print(r.json())
+            pretty_print(_loads(r.content))
         except Exception:
             print(r.text[:1000])
         sys.exit(1)
 
-    data = r.json()
+    data = _loads(r.content)
     print('\n=== Response summary ===')
     print('Total distance:', data.get('total_distance'))
     print('Algorithm used:', data.get('algorithm_used'))
@@ -1,5 +1,24 @@
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
 import unittest
-from app import TSPSolver, DistanceMatrixCalculator
+from unittest import mock
+import numpy as np
+import requests
+from flask import jsonify
+from app import app, TSPSolver, DistanceMatrixCalculator, RateLimiter, haversine, haversine_matrix
+
+
+def random_matrix(n, seed=0):
+    # Asymmetric matrix with zero diagonal, like real driving distances
+    rng = random.Random(seed)
+    return [[0.0 if i == j else rng.uniform(1, 100) for j in range(n)]
+            for i in range(n)]
+
 
 class TestTSPSolver(unittest.TestCase):
     def test_nearest_neighbor_simple(self):
@@ -19,7 +38,107 @@ class TestTSPSolver(unittest.TestCase):
         self.assertEqual(path[-1], 0)
         self.assertTrue(dist > 0)
 
+    def test_nearest_neighbor_with_only_infinite_distances_left(self):
+        inf = float('inf')
+        dm = [[0.0, 1.0, inf, inf],
+              [inf, 0.0, inf, inf],
+              [inf, inf, 0.0, inf],
+              [inf, inf, inf, 0.0]]
+        solver = TSPSolver(['A', 'B', 'C', 'D'], dm)
+        expected = [0, 1, 2, 3, 0]
+        path, _ = solver.nearest_neighbor(0)
+        self.assertEqual(path, expected)
+        with mock.patch('app.NUMBA_AVAILABLE', False):
+            path, _ = solver.nearest_neighbor(0)
+        self.assertEqual(path, expected)
+
+    def test_nearest_neighbor_rejects_out_of_range_start(self):
+        solver = TSPSolver(['A', 'B', 'C'], random_matrix(3))
+        for start in (3, -1):
+            with self.assertRaises(ValueError):
+                solver.nearest_neighbor(start)
+
+    def test_nearest_neighbor_path(self):
+        dm = [
+            [0, 1, 5, 2],
+            [1, 0, 1, 4],
+            [5, 1, 0, 1],
+            [2, 4, 1, 0]
+        ]
+        solver = TSPSolver(["A", "B", "C", "D"], dm)
+        path, dist = solver.nearest_neighbor(0)
+        self.assertEqual(path, [0, 1, 2, 3, 0])
+        self.assertAlmostEqual(dist, 5.0)
+        names, best = solver.solve_all_starting_points()
+        self.assertAlmostEqual(best, 5.0)
+        self.assertEqual(len(names), 5)
+
+    def test_nearest_neighbor_all_starts_matches_single(self):
+        inf = float('inf')
+        # Second matrix leaves only inf distances part way through a tour
+        only_inf_left = [[0.0, 1.0, inf, inf],
+                         [inf, 0.0, inf, inf],
+                         [inf, inf, 0.0, inf],
+                         [inf, inf, inf, 0.0]]
+        for dm in (random_matrix(8, seed=2), only_inf_left):
+            n = len(dm)
+            solver = TSPSolver([str(i) for i in range(n)], dm)
+            paths, totals = solver.nearest_neighbor_all_starts()
+            for start in range(n):
+                path, dist = solver.nearest_neighbor(start)
+                self.assertEqual(paths[start].tolist(), path)
+                self.assertEqual(sorted(path[:-1]), list(range(n)))
+                self.assertAlmostEqual(totals[start], dist)
+
+    def test_exact_solvers_match_permutation_search(self):
+        for seed in range(3):
+            dm = random_matrix(7, seed)
+            solver = TSPSolver([str(i) for i in range(7)], dm)
+            # Independent reference: every tour from location 0
+            ref_dist = min(
+                sum(dm[a][b] for a, b in zip((0, *perm), (*perm, 0)))
+                for perm in itertools.permutations(range(1, 7))
+            )
+            hk_path, hk_dist = solver._held_karp_optimal()
+            bb_path, bb_dist = solver._brute_force_optimal()
+            self.assertAlmostEqual(hk_dist, ref_dist, places=6)
+            self.assertAlmostEqual(bb_dist, ref_dist, places=6)
+            self.assertEqual(hk_path[0], '0')
+            self.assertEqual(hk_path[-1], '0')
+            self.assertEqual(sorted(hk_path[:-1]), sorted(solver.locations))
+
+    def test_two_opt_improves_nearest_neighbor(self):
+        dm = random_matrix(9, seed=4)
+        solver = TSPSolver([str(i) for i in range(9)], dm)
+        nn_path, nn_dist = solver.nearest_neighbor(0)
+        path, dist = solver.two_opt(nn_path)
+        _, opt_dist = solver._held_karp_optimal()
+        self.assertEqual(sorted(path[:-1]), list(range(9)))
+        self.assertEqual(path[0], path[-1])
+        self.assertLessEqual(dist, nn_dist + 1e-9)
+        self.assertGreaterEqual(dist, opt_dist - 1e-9)
+        self.assertAlmostEqual(dist, solver._calculate_path_distance(path))
+
+
 class TestDistanceCalculator(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def make_calc(self):
+        """Calculator whose geocode and matrix caches start empty in self.tmp."""
+        # Both cache paths are derived from app.__file__
+        with mock.patch('app.__file__', os.path.join(self.tmp, 'app.py')):
+            calc = DistanceMatrixCalculator(api_key='')
+        self.addCleanup(self.stop_flush_timer, calc)
+        return calc
+
+    @staticmethod
+    def stop_flush_timer(calc):
+        if calc._matrix_flush_timer is not None:
+            calc._matrix_flush_timer.cancel()
+
     def test_haversine(self):
         calc = DistanceMatrixCalculator(api_key='')
         # Mumbai (approx) and Delhi (approx)
@@ -29,5 +148,435 @@ class TestDistanceCalculator(unittest.TestCase):
         # Rough distance ~1140 km
         self.assertTrue(1000 < km < 1500)
 
+    def test_haversine_matrix_matches_scalar(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        coords = [(19.0760, 72.8777), (28.7041, 77.1025), (15.3005, 74.0855)]
+        with mock.patch.object(calc, '_geocode_locations_nominatim', return_value=coords):
+            matrix = calc._get_haversine_matrix(['a', 'b', 'c'])
+        for i, (lat1, lon1) in enumerate(coords):
+            for j, (lat2, lon2) in enumerate(coords):
+                expected = calc._haversine_km(lat1, lon1, lat2, lon2)
+                self.assertAlmostEqual(matrix[i][j], expected, places=6)
+
+    def test_haversine_matrix_function(self):
+        lats = [19.0760, 28.7041, 15.3005, 17.3871]
+        lons = [72.8777, 77.1025, 74.0855, 78.4917]
+        matrix = haversine_matrix(lats, lons)
+        self.assertEqual(matrix.shape, (4, 4))
+        self.assertTrue((matrix == matrix.T).all())
+        for i in range(4):
+            self.assertEqual(matrix[i, i], 0.0)
+            for j in range(4):
+                self.assertAlmostEqual(matrix[i, j], haversine(lats[i], lons[i], lats[j], lons[j]), places=1)
+
+    def test_fill_pairwise_distances(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        coords = [(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]
+        dm = [[0.0, 999999.0, 999999.0],
+              [999999.0, 0.0, 999999.0],
+              [999999.0, 999999.0, 0.0]]
+
+        def fake_route(origin, destination, max_retries=3):
+            if origin == coords[2]:
+                return None  # no route found: keep sentinel
+            return origin[0] + destination[0]
+
+        pairs = [(i, j) for i in range(3) for j in range(3) if i != j]
+        with mock.patch.object(calc, '_fetch_route_pair', side_effect=fake_route):
+            calc._fill_pairwise_distances(coords, pairs, dm, ['a', 'b', 'c'])
+        self.assertEqual(dm[0][1], 1.0)
+        self.assertEqual(dm[1][2], 3.0)
+        self.assertEqual(dm[2][0], 999999.0)
+
+    def test_fill_pairwise_distances_symmetric(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        coords = [(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]
+        dm = [[0.0, 999999.0, 999999.0],
+              [999999.0, 0.0, 999999.0],
+              [999999.0, 999999.0, 0.0]]
+        pairs = [(0, 1), (0, 2), (1, 2)]
+        with mock.patch.object(calc, '_fetch_route_pair', return_value=7.5) as fetch:
+            calc._fill_pairwise_distances(coords, pairs, dm, ['a', 'b', 'c'], symmetric=True)
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(dm, [[0.0, 7.5, 7.5], [7.5, 0.0, 7.5], [7.5, 7.5, 0.0]])
+
+    def test_geocode_preserves_order_and_dedupes(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        calc._geocode_cache = {'cached town': (1.0, 2.0)}
+        lookup = {'Alpha': (10.0, 20.0), 'Beta': (30.0, 40.0)}
+        with mock.patch.object(calc, '_geocode_one', side_effect=lookup.get) as one:
+            coords = calc._geocode_locations_nominatim(
+                ['Alpha', 'Cached Town', 'Beta', 'alpha '])
+        self.assertEqual(coords, [(10.0, 20.0), (1.0, 2.0), (30.0, 40.0), (10.0, 20.0)])
+        self.assertEqual(one.call_count, 2)
+
+    def test_geocode_cache_written_once_per_call(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        calc._geocode_cache = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            calc._cache_path = os.path.join(tmp, 'geocode_cache.json')
+
+            def fake_one(loc):
+                calc._remember_geocode(loc.lower(), 1.0, 2.0)
+                return (1.0, 2.0)
+
+            with mock.patch.object(calc, '_geocode_one', side_effect=fake_one), \
+                    mock.patch.object(calc, '_write_text_atomic', wraps=calc._write_text_atomic) as write:
+                calc._geocode_locations_nominatim(['X', 'Y', 'Z'])
+            self.assertEqual(write.call_count, 1)
+            with open(calc._cache_path, encoding='utf-8') as fh:
+                self.assertEqual(set(json.load(fh)), {'x', 'y', 'z'})
+            written = [f for f in os.listdir(tmp) if not f.endswith('.lock')]
+            self.assertEqual(written, ['geocode_cache.json'])
+
+    def test_geocode_cache_save_merges_other_workers(self):
+        workers = [self.make_calc(), self.make_calc()]
+        for name, calc in zip(('first', 'second'), workers):
+            calc._remember_geocode(name, 1.0, 2.0)
+        for calc in workers:
+            calc._save_geocode_cache()
+        with open(workers[0]._cache_path, encoding='utf-8') as fh:
+            self.assertEqual(set(json.load(fh)), {'first', 'second'})
+
+    def test_rate_limiter_spaces_threads(self):
+        limiter = RateLimiter(0.05)
+        stamps = []
+
+        def call():
+            limiter.wait()
+            stamps.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stamps.sort()
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        self.assertTrue(all(g >= 0.04 for g in gaps), gaps)
+
+    def test_osrm_table_split_by_sources(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        n = 5
+
+        def fake_table(url, params):
+            rows = [int(i) for i in params['sources'].split(';')]
+            return [[float(10 * i + j) for j in range(n)] for i in rows]
+
+        with mock.patch('app.OSRM_TABLE_SPLIT_THRESHOLD', 2), \
+                mock.patch.object(calc, '_osrm_table_request', side_effect=fake_table) as req:
+            table = calc._osrm_table_distances('coords', n)
+        self.assertEqual(req.call_count, 3)
+        self.assertEqual(table, [[float(10 * i + j) for j in range(n)] for i in range(n)])
+
+    def test_get_distance_matrix_from_osrm_table(self):
+        calc = self.make_calc()
+        coords = [(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]
+        table = [[0, 1500, None], [2000, 0, 2500], [3000, 3500, 0]]
+        with mock.patch('app.ASSUME_SYMMETRIC_DRIVING', False), \
+                mock.patch.object(calc, '_geocode_locations_nominatim', return_value=coords), \
+                mock.patch.object(calc, '_osrm_table_distances', return_value=table), \
+                mock.patch.object(calc, '_fetch_route_pair', return_value=4.25) as fetch:
+            matrix = calc.get_distance_matrix(['Goa', 'Pune', 'Mumbai'])
+        fetch.assert_called_once()
+        self.assertIsInstance(matrix, np.ndarray)
+        self.assertEqual(matrix.tolist(),
+                         [[0.0, 1.5, 4.25], [2.0, 0.0, 2.5], [3.0, 3.5, 0.0]])
+
+    def test_pairwise_fallback_fetches_upper_triangle(self):
+        coords = [(15.30, 74.09), (19.06, 72.87), (17.39, 78.49), (18.52, 73.86)]
+        locations = ['Goa', 'Mumbai', 'Hyderabad', 'Pune']
+        for symmetric, expected_calls in ((True, 6), (False, 12)):
+            calc = self.make_calc()
+            with mock.patch('app.ASSUME_SYMMETRIC_DRIVING', symmetric), \
+                    mock.patch.object(calc, '_geocode_locations_nominatim', return_value=coords), \
+                    mock.patch.object(calc, '_osrm_table_distances', return_value=None), \
+                    mock.patch.object(calc, '_fetch_route_pair',
+                                      side_effect=lambda a, b, r: haversine(*a, *b) * 1.3) as fetch:
+                matrix = calc.get_distance_matrix(locations)
+            self.assertEqual(fetch.call_count, expected_calls)
+            self.assertTrue(np.all(np.diag(matrix) == 0.0))
+            self.assertTrue(np.allclose(matrix, matrix.T, rtol=1e-3))
+            self.assertTrue(np.all(matrix[~np.eye(4, dtype=bool)] < 999999.0))
+
+    def test_osrm_get_hedges_slow_primary(self):
+        calc = DistanceMatrixCalculator(api_key='')
+
+        def fake_get(url, params=None, timeout=30, **kwargs):
+            if url.startswith('http://primary'):
+                time.sleep(0.3)
+                return 'primary'
+            return 'backup'
+
+        with mock.patch('app.OSRM_BASE_URL', 'http://primary'), \
+                mock.patch('app.OSRM_BASE_URLS', ['http://primary', 'http://backup']), \
+                mock.patch('app.OSRM_HEDGE_DELAY_MS', 20), \
+                mock.patch.object(calc, '_requests_with_retries', side_effect=fake_get) as get:
+            self.assertEqual(calc._osrm_get('/route/v1/driving/x'), 'backup')
+            get.assert_any_call('http://backup/route/v1/driving/x', params=None, timeout=30,
+                                abandon=mock.ANY)
+
+            # Without a backup host the primary is used directly
+            with mock.patch('app.OSRM_BASE_URLS', ['http://primary']):
+                self.assertEqual(calc._osrm_get('/route/v1/driving/x'), 'primary')
+
+    def test_osrm_hedge_loser_stops_retrying(self):
+        calc = DistanceMatrixCalculator(api_key='')
+        ok = mock.Mock(status_code=200)
+
+        def fake_get(url, params=None, timeout=30, **kwargs):
+            if url.startswith('http://primary'):
+                threading.Event().wait(0.2)
+                raise requests.ConnectionError('primary down')
+            return ok
+
+        # Backoff sleeps are skipped, so a primary that kept retrying would
+        # hit its retry limit well within the wait below
+        with mock.patch('app.OSRM_BASE_URL', 'http://primary'), \
+                mock.patch('app.OSRM_BASE_URLS', ['http://primary', 'http://backup']), \
+                mock.patch('app.OSRM_HEDGE_DELAY_MS', 20), \
+                mock.patch('app.time.sleep'), \
+                mock.patch.object(calc.session, 'get', side_effect=fake_get) as get:
+            self.assertIs(calc._osrm_get('/route/v1/driving/x'), ok)
+            threading.Event().wait(0.8)
+        primary_calls = [c for c in get.call_args_list if c.args[0].startswith('http://primary')]
+        self.assertEqual(len(primary_calls), 1)
+
+    def test_distance_matrix_cache_reuse(self):
+        calc = self.make_calc()
+        calc._store_distance_matrix(['a', 'b', 'c'], [[0, 1, 2], [3, 0, 4], [5, 6, 0]])
+        # Writes are batched until the flush
+        self.assertFalse(os.path.isfile(calc._matrix_cache_path))
+        calc.flush_matrix_cache()
+        self.assertTrue(os.path.isfile(calc._matrix_cache_path))
+
+        # Same set in another order: full hit, permuted to input order
+        matrix, missing = calc._cached_distance_matrix(['c', 'a', 'b'])
+        self.assertEqual(missing, [])
+        self.assertEqual(matrix.tolist(), [[0, 5, 6], [2, 0, 1], [4, 3, 0]])
+
+        # One new location: only its pairs are missing
+        matrix, missing = calc._cached_distance_matrix(['a', 'b', 'd'])
+        self.assertEqual(sorted(missing), [(0, 2), (1, 2), (2, 0), (2, 1)])
+        self.assertEqual(matrix[0][1], 1)
+        self.assertEqual(matrix[2][0], 999999.0)
+
+    def test_partial_reuse_geocode_failure_falls_back_once(self):
+        calc = self.make_calc()
+        calc._store_distance_matrix(['a', 'b'], [[0, 7], [8, 0]])
+        with mock.patch.object(calc, '_geocode_locations_nominatim',
+                               side_effect=RuntimeError('down')) as geocode, \
+                mock.patch.object(calc, '_fill_pairwise_distances') as fill:
+            matrix = calc.get_distance_matrix(['a', 'b', 'c'])
+        # One attempt for the lookup, one for the Haversine fallback
+        self.assertEqual(geocode.call_count, 2)
+        fill.assert_not_called()
+        self.assertEqual(matrix[0][2], 999999.0)
+
+    def test_distance_matrix_memo_returns_copies(self):
+        calc = self.make_calc()
+        calc._store_distance_matrix(['a', 'b'], [[0, 7], [8, 0]])
+        first, _ = calc._cached_distance_matrix(['a', 'b'])
+        first[0, 1] = -1.0
+        again, _ = calc._cached_distance_matrix(['a', 'b'])
+        self.assertEqual(again.tolist(), [[0, 7], [8, 0]])
+
+        # Entries loaded from disk are decoded once, then served from memory
+        calc._matrix_memo.clear()
+        matrix, _ = calc._cached_distance_matrix(['b', 'a'])
+        self.assertEqual(matrix.tolist(), [[0, 8], [7, 0]])
+        calc._matrix_cache = {'matrices': {}, 'pairs': {}}
+        matrix, missing = calc._cached_distance_matrix(['a', 'b'])
+        self.assertEqual(missing, [])
+        self.assertEqual(matrix.tolist(), [[0, 7], [8, 0]])
+
+    def test_distance_matrix_memo_honors_disk_ttl(self):
+        calc = self.make_calc()
+        calc._store_distance_matrix(['a', 'b'], [[0, 7], [8, 0]])
+        self.assertEqual(calc._cached_distance_matrix(['a', 'b'])[1], [])
+        # Disk TTL below the memo's 24 hours: the memo must not outlive it
+        with mock.patch('app.MATRIX_CACHE_TTL_DAYS', 0.5 / 86400):
+            time.sleep(0.6)
+            _, missing = calc._cached_distance_matrix(['a', 'b'])
+        self.assertEqual(sorted(missing), [(0, 1), (1, 0)])
+        self.assertNotIn(calc._matrix_cache_key(['a', 'b']), calc._matrix_memo)
+
+    def test_matrix_cache_flush_merges_and_prunes(self):
+        # Workers sharing self.tmp write the same cache file
+        first, second = self.make_calc(), self.make_calc()
+        first._store_distance_matrix(['a', 'b'], [[0, 1], [2, 0]])
+        second._store_distance_matrix(['c', 'd'], [[0, 3], [4, 0]])
+        # An expired entry is dropped on the next write
+        second._matrix_cache['matrices']['old'] = {'locations': [], 'matrix': [], 'ts': 0}
+        with mock.patch('app.MATRIX_CACHE_MAX_MATRICES', 2):
+            first.flush_matrix_cache()
+            second.flush_matrix_cache()
+            third = self.make_calc()
+            third._matrix_cache = {'matrices': {}, 'pairs': {}}
+            third._store_distance_matrix(['e', 'f'], [[0, 5], [6, 0]])
+            third.flush_matrix_cache()
+        with open(third._matrix_cache_path, encoding='utf-8') as fh:
+            on_disk = json.load(fh)
+        self.assertEqual(len(on_disk['matrices']), 2)
+        self.assertNotIn('old', on_disk['matrices'])
+        self.assertEqual(set(on_disk['pairs']), {'a', 'b', 'c', 'd', 'e', 'f'})
+        # Both workers' matrices survived the other's write
+        kept = {tuple(v['locations']) for v in on_disk['matrices'].values()}
+        self.assertIn(('e', 'f'), kept)
+
+    def test_matrix_cache_prune_caps_pair_rows(self):
+        calc = self.make_calc()
+        now = time.time()
+        calc._matrix_cache = {'matrices': {}, 'pairs': {
+            'a': {'b': [1.0, now - 30], 'c': [2.0, now - 1]},
+            'b': {'a': [1.0, now - 20]},
+            'c': {'a': [2.0, now - 10]},
+            'd': {'a': [3.0, 0]},
+        }}
+        with mock.patch('app.MATRIX_CACHE_MAX_PAIR_ROWS', 2):
+            calc._prune_matrix_cache()
+        # Expired rows go first, then the least recently written
+        self.assertEqual(set(calc._matrix_cache['pairs']), {'a', 'c'})
+
+
+class TestEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_autocomplete_empty_query(self):
+        resp = self.client.get('/autocomplete?q=')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/json')
+        self.assertEqual(resp.get_json(), {'suggestions': []})
+
+    def test_autocomplete_caches_normalized_query(self):
+        photon = mock.Mock(status_code=200)
+        photon.json.return_value = {'features': [{
+            'properties': {'name': 'Mumbai', 'country': 'India'},
+            'geometry': {'coordinates': [72.88, 19.08]},
+        }]}
+        with mock.patch.dict('app._AC_CACHE', clear=True), \
+                mock.patch('app.SESSION.get', return_value=photon) as get:
+            first = self.client.get('/autocomplete?q=Mumbai&limit=5')
+            second = self.client.get('/autocomplete?q=%20mumbai%20&limit=5')
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(second.get_json()['suggestions'][0]['name'], 'Mumbai')
+        self.assertEqual(second.headers['Cache-Control'], 'public, max-age=600')
+
+    def test_autocomplete_coalesces_concurrent_queries(self):
+        release = threading.Event()
+        photon = mock.Mock(status_code=200)
+        photon.json.return_value = {'features': [{
+            'properties': {'name': 'Pune'},
+            'geometry': {'coordinates': [73.86, 18.52]},
+        }]}
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return photon
+
+        bodies = []
+
+        def fetch():
+            bodies.append(app.test_client().get('/autocomplete?q=pune&limit=3').get_json())
+
+        with mock.patch.dict('app._AC_CACHE', clear=True), \
+                mock.patch('app.SESSION.get', side_effect=slow_get) as get:
+            threads = [threading.Thread(target=fetch) for _ in range(4)]
+            for t in threads:
+                t.start()
+            time.sleep(0.3)
+            release.set()
+            for t in threads:
+                t.join()
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(bodies), 4)
+        self.assertTrue(all(b['suggestions'][0]['name'] == 'Pune' for b in bodies))
+
+    def test_nearest_neighbor_endpoint_best_start(self):
+        dm = [
+            [0, 1, 5, 2],
+            [1, 0, 1, 4],
+            [5, 1, 0, 1],
+            [2, 4, 1, 0]
+        ]
+        with mock.patch('app._CALC.get_distance_matrix', return_value=dm):
+            resp = self.client.post('/nearest-neighbor', json={'locations': ['A', 'B', 'C', 'D']})
+        body = resp.get_json()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(body['path_indices'], [0, 1, 2, 3, 0])
+        self.assertEqual(body['path_names'], ['A', 'B', 'C', 'D', 'A'])
+        self.assertAlmostEqual(body['total_distance'], 5.0)
+
+    def test_jsonify_serializes_numpy(self):
+        payload = {'matrix': np.array([[0.0, 1.5], [1.5, 0.0]]), 'total': np.float64(3.0)}
+        expected = {'matrix': [[0.0, 1.5], [1.5, 0.0]], 'total': 3.0}
+        with app.app_context():
+            self.assertEqual(jsonify(payload).get_json(), expected)
+            with mock.patch('app.orjson', None):
+                self.assertEqual(jsonify(payload).get_json(), expected)
+
+    def test_nearest_neighbor_endpoint_rejects_bad_start(self):
+        dm = random_matrix(4, seed=1)
+        with mock.patch('app._CALC.get_distance_matrix', return_value=dm) as get:
+            for start in (4, 100000000, -1):
+                resp = self.client.post('/nearest-neighbor',
+                                        json={'locations': ['A', 'B', 'C', 'D'], 'start_index': start})
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn('error', resp.get_json())
+        get.assert_not_called()
+
+    def test_nearest_neighbor_endpoint_applies_two_opt(self):
+        rng = random.Random(0)
+        dm = [[0.0 if i == j else float(rng.randint(1, 20)) for j in range(6)] for i in range(6)]
+        locations = ['A', 'B', 'C', 'D', 'E', 'F']
+        _, nn_dist = TSPSolver(locations, dm).nearest_neighbor(0)
+        with mock.patch('app._CALC.get_distance_matrix', return_value=dm):
+            body = self.client.post('/nearest-neighbor',
+                                    json={'locations': locations, 'start_index': 0}).get_json()
+        self.assertEqual(body['path_indices'][0], 0)
+        self.assertEqual(body['path_indices'][-1], 0)
+        self.assertLess(body['total_distance'], nn_dist)
+
+    def test_calculate_route_reports_algorithm(self):
+        dm = random_matrix(6, seed=3)
+        locations = ['A', 'B', 'C', 'D', 'E', 'F']
+        with mock.patch('app._CALC.get_distance_matrix', return_value=dm), \
+                mock.patch('app._CALC._geocode_locations_nominatim', return_value=[]):
+            exact = self.client.post('/calculate-route', json={'locations': locations}).get_json()
+            with mock.patch('app.HELD_KARP_MAX_LOCATIONS', 4):
+                heuristic = self.client.post('/calculate-route', json={'locations': locations}).get_json()
+        self.assertEqual(exact['algorithm_used'], 'held_karp')
+        self.assertEqual(heuristic['algorithm_used'], 'nearest_neighbor_2opt')
+        self.assertLessEqual(exact['total_distance'], heuristic['total_distance'] + 1e-9)
+
+    def test_large_responses_compressed(self):
+        dm = random_matrix(20, seed=5)
+        locations = [f'L{i}' for i in range(20)]
+        with mock.patch('app._CALC.get_distance_matrix', return_value=dm):
+            resp = self.client.post('/nearest-neighbor', json={'locations': locations},
+                                    headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(resp.headers.get('Content-Encoding'), 'br')
+        small = self.client.get('/autocomplete?q=', headers={'Accept-Encoding': 'br, gzip'})
+        self.assertNotIn('Content-Encoding', small.headers)
+
+    def test_search_uses_frozen_nominatim_params(self):
+        found = mock.Mock(status_code=200)
+        found.json.return_value = [{'display_name': 'Pune, India', 'lat': '18.52', 'lon': '73.86'}]
+        with mock.patch('app.SESSION.get', return_value=found) as get:
+            resp = self.client.get('/search?q=pune')
+        self.assertEqual(resp.status_code, 200)
+        params = dict(get.call_args.kwargs['params'])
+        self.assertEqual(params['q'], 'pune')
+        self.assertNotIn('countrycodes', params)
+        self.assertEqual(params['limit'], '1')
+
+    def test_search_requires_query(self):
+        resp = self.client.get('/search')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('error', resp.get_json())
+
+
 if __name__ == '__main__':
     unittest.main()
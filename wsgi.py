@@ -0,0 +1,17 @@
+"""WSGI entry point for production, served by gunicorn with gevent workers:
+
+    gunicorn -k gevent -w 2 --worker-connections 500 --bind 0.0.0.0:$PORT wsgi:app
+
+Almost every request spends its time waiting on OSRM, Photon or Nominatim,
+so each gevent worker can keep hundreds of them in flight at once.
+"""
+# Patch sockets/threads before app imports requests, so the shared SESSION
+# pool and the worker thread pools cooperate with gevent
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402
+
+if __name__ == '__main__':
+    # Dev only: production runs the gunicorn command above
+    app.run(host='0.0.0.0', port=5000)